@@ -1,17 +1,50 @@
 # coding=utf-8
 
+import calendar
 import json
 import logging
 import os
 
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
+from status_history import StatusHistoryReader, history_file_for
+from status_store import StatusStore, listen, watch_file
+from werkzeug.http import http_date
 
 logger = logging.getLogger(__name__)
 logging.getLogger().setLevel(logging.INFO)
 
+# Seconds between two keep-alive comments on idle event streams
+KEEP_ALIVE_SECS = 15
+# Default max number of samples returned by a history query
+HISTORY_LIMIT = 3600
+
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=['ETag', 'Last-Modified'])
+
+store = StatusStore()
+history_readers = {}
+
+
+def conditional_response(entry):
+    """ Serve a :class:`~status_store.StatusEntry` as is, or ``304 Not Modified`` when the client
+        already has it (``If-None-Match`` or ``If-Modified-Since``)
+    """
+    if entry is None:
+        return jsonify({'error': 'Not found'}), 404
+
+    headers = {'ETag': '"{}"'.format(entry.etag), 'Last-Modified': http_date(entry.last_modified),
+               'Cache-Control': 'no-cache'}
+    # the ETag is exact, If-Modified-Since only counts when there is none
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains(entry.etag)
+    elif request.if_modified_since:
+        not_modified = not entry.modified_since(calendar.timegm(request.if_modified_since.utctimetuple()))
+    else:
+        not_modified = False
+    if not_modified:
+        return Response(status=304, headers=headers)
+    return Response(entry.payload, mimetype='application/json', headers=headers)
 
 
 @app.route('/')
@@ -21,11 +54,87 @@ def default():
 
 @app.route('/status')
 def get_status():
+    entry = store.get_entry()
+    if entry is not None:
+        return conditional_response(entry)
+    # nothing was received from the tracker yet, fall back to its status file
     filepath = os.getenv('STATUS_FILE', '../status.json')
     with open(filepath, 'r') as status_file:
         status_data = json.load(status_file)
     return jsonify(status_data)
 
 
+@app.route('/cameras')
+def get_cameras():
+    return jsonify({'cameras': store.cameras(), 'pools': store.pools()})
+
+
+@app.route('/cameras/<camera>/status')
+def get_camera_status(camera):
+    return conditional_response(store.get_entry(camera))
+
+
+@app.route('/pools/<pool>/status')
+def get_pool_status(pool):
+    """ Statuses of every camera of ``pool``, by camera id
+    """
+    return conditional_response(store.get_pool_entry(pool))
+
+
+def history_reader(camera):
+    """ Returns the (cached) reader of the status history of ``camera``, ``None`` if there is none
+    """
+    path = history_file_for(os.getenv('STATUS_HISTORY_FILE', '../status_history.bin'), camera)
+    if path not in history_readers:
+        if not os.path.exists(path):
+            return None
+        history_readers[path] = StatusHistoryReader(path)
+    return history_readers[path]
+
+
+@app.route('/status/history')
+def get_status_history():
+    """ Status samples of a camera within a time range, oldest first
+
+        Query parameters: ``from`` and ``to`` timestamps in milliseconds (``to`` exclusive), ``camera`` id
+        (none for a single camera tracker) and ``limit``, the max number of samples
+    """
+    camera = request.args.get('camera')
+    start = request.args.get('from', type=int)
+    end = request.args.get('to', type=int)
+    limit = request.args.get('limit', HISTORY_LIMIT, type=int)
+
+    reader = history_reader(camera)
+    if reader is None:
+        return jsonify({'error': 'No history for camera {}'.format(camera)}), 404
+    samples = reader.query_dicts(start / 1000. if start is not None else None,
+                                 end / 1000. if end is not None else None, limit)
+    return jsonify({'camera': camera, 'samples': samples})
+
+
+@app.route('/status/stream')
+def stream_status():
+    """ Server-Sent Events stream of the status: every status is pushed as soon as the tracker sends it.
+        Optionally filtered by the ``camera`` query parameter
+    """
+    camera = request.args.get('camera')
+
+    def events():
+        version = 0
+        while True:
+            version, changes = store.wait(version, camera=camera, timeout=KEEP_ALIVE_SECS)
+            if not changes:
+                yield ': keep-alive\n\n'
+            for change_version, payload in changes:
+                yield 'id: {}\ndata: {}\n\n'.format(change_version, payload)
+
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0')
+    if os.getenv('STATUS_SOCKET'):
+        listen(store, os.getenv('STATUS_SOCKET'))
+    else:
+        watch_file(store, os.getenv('STATUS_FILE', '../status.json'))
+    app.run(host='0.0.0.0', threaded=True)
@@ -0,0 +1,192 @@
+# coding=utf-8
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Max size of a status datagram
+MAX_STATUS_SIZE = 1 << 20
+
+
+class StatusEntry(object):
+    """ A serialized status, ready to be served as is
+
+        Attributes:
+            ``version`` (int): store version of the last update
+            ``payload`` (str): JSON body
+            ``status`` (dict): parsed status, ``None`` for aggregated entries
+            ``etag`` (str): entity tag, unique across updates and API restarts
+            ``last_modified`` (int): timestamp of the last update, in whole seconds as sent in ``Last-Modified``
+            ``first_in_second`` (bool): whether the entry it replaces is from an earlier second. If not,
+                a client holding ``last_modified`` may have an older version
+    """
+
+    def __init__(self, version, payload, status, epoch, last_modified, previous=None):
+        self.version = version
+        self.payload = payload
+        self.status = status
+        self.etag = '{}-{}'.format(epoch, version)
+        self.last_modified = last_modified
+        self.first_in_second = previous is None or previous.last_modified < last_modified
+
+    def modified_since(self, timestamp):
+        """ Whether the entry may have changed since ``timestamp``, in whole seconds
+        """
+        return self.last_modified > timestamp or (self.last_modified == timestamp and not self.first_in_second)
+
+
+class StatusStore(object):
+    """ Latest status of every camera, held in memory
+
+        Statuses are kept serialized, per camera and per pool (a JSON object of the statuses of the
+        cameras of the pool, by camera id), so they are served without any serialization.
+        Every update bumps a version number, so clients can wait for the statuses that changed since
+        the last version they saw (see :meth:`wait`) instead of polling.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.epoch = int(time.time())
+        self._cameras = {}
+        self._pools = {}
+        self._pool_cameras = {}
+        self._cond = threading.Condition()
+
+    def update(self, payload):
+        """ Store a status
+
+            Args:
+                ``payload`` (str): JSON status, as published by the tracker. Statuses are keyed by
+                    their ``camera`` field, as a string, ``None`` when there is none, and grouped by
+                    their ``pool`` field, if they have both
+        """
+        status = json.loads(payload)
+        camera = status.get('camera')
+        camera = str(camera) if camera is not None else None
+        pool = status.get('pool')
+        last_modified = int(status.get('updatedAt', time.time() * 1000) // 1000)
+        with self._cond:
+            self.version += 1
+            self._cameras[camera] = StatusEntry(self.version, payload, status, self.epoch, last_modified,
+                                                self._cameras.get(camera))
+            if pool is not None and camera is not None:
+                pool = str(pool)
+                cameras = self._pool_cameras.setdefault(pool, set())
+                cameras.add(camera)
+                pool_payload = '{{{}}}'.format(', '.join('{}: {}'.format(json.dumps(c), self._cameras[c].payload)
+                                                         for c in sorted(cameras)))
+                self._pools[pool] = StatusEntry(self.version, pool_payload, None, self.epoch, last_modified,
+                                                self._pools.get(pool))
+            self._cond.notify_all()
+
+    def get(self, camera=None):
+        """ Returns the latest status of ``camera``, or the most recent one of any camera if it is ``None``
+            and there is no camera-less status. ``None`` if there is none
+        """
+        entry = self.get_entry(camera)
+        return entry.status if entry is not None else None
+
+    def get_entry(self, camera=None):
+        """ Same as :meth:`get`, but returns the :class:`StatusEntry`
+        """
+        with self._cond:
+            if camera is not None or None in self._cameras:
+                return self._cameras.get(camera)
+            if not self._cameras:
+                return None
+            return max(self._cameras.values(), key=lambda entry: entry.version)
+
+    def get_pool_entry(self, pool):
+        """ Returns the :class:`StatusEntry` of the statuses of the cameras of ``pool``, ``None`` if unknown
+        """
+        with self._cond:
+            return self._pools.get(pool)
+
+    def cameras(self):
+        with self._cond:
+            return sorted(c for c in self._cameras if c is not None)
+
+    def pools(self):
+        with self._cond:
+            return dict((pool, sorted(cameras)) for pool, cameras in self._pool_cameras.items())
+
+    def wait(self, after_version, camera=None, timeout=None):
+        """ Block until a status newer than ``after_version`` is stored
+
+            Args:
+                ``after_version`` (int): last version seen by the caller
+                ``camera``: only wait for this camera, any camera if ``None``
+                ``timeout`` (float): max time to wait, in seconds
+
+            Returns:
+                Tuple of the current version and the list of ``(version, payload)`` newer than
+                ``after_version``, oldest first. The list is empty on timeout
+        """
+        def changes():
+            return sorted((entry.version, entry.payload) for key, entry in self._cameras.items()
+                          if entry.version > after_version and (camera is None or key == camera))
+
+        with self._cond:
+            self._cond.wait_for(changes, timeout)
+            return self.version, changes()
+
+
+def listen(store, path):
+    """ Feed ``store`` with the statuses the tracker sends as datagrams to the Unix socket ``path``,
+        from a daemon thread
+
+        Returns:
+            The listener thread
+    """
+    if os.path.exists(path):
+        os.unlink(path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    sock.bind(path)
+
+    def _receive_loop():
+        while True:
+            payload = sock.recv(MAX_STATUS_SIZE)
+            try:
+                store.update(payload.decode('utf-8'))
+            except ValueError:
+                logger.warning('Discarding invalid status from {}'.format(path))
+
+    thread = threading.Thread(target=_receive_loop, name='StatusStore-Listener')
+    thread.daemon = True
+    thread.start()
+    logger.info('Listening for statuses on {}'.format(path))
+    return thread
+
+
+def watch_file(store, path, interval=0.2):
+    """ Feed ``store`` with the status file ``path`` every time it changes, checked every ``interval``
+        seconds from a daemon thread. For trackers that do not push their statuses (no ``STATUS_SOCKET``)
+
+        Returns:
+            The watcher thread
+    """
+    def _watch_loop():
+        last_mtime = None
+        while True:
+            try:
+                mtime = os.stat(path).st_mtime_ns
+                if mtime != last_mtime:
+                    with open(path) as status_file:
+                        payload = status_file.read()
+                    store.update(payload)
+                    last_mtime = mtime
+            except (IOError, OSError, ValueError):
+                # not written yet, the tracker replaces it atomically otherwise
+                pass
+            time.sleep(interval)
+
+    thread = threading.Thread(target=_watch_loop, name='StatusStore-FileWatcher')
+    thread.daemon = True
+    thread.start()
+    logger.info('Watching statuses in {}'.format(path))
+    return thread
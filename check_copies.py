@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+""" Check that the modules copied into several apps, each built from its own directory, did not drift apart
+
+    Usage: ``python check_copies.py``, from the repository root
+"""
+
+import sys
+
+# (original, copy, first line compared): copies whose headers (module docstring, imports) differ are compared
+# from that line on, whole files are compared otherwise
+COPIES = [('tracker/status_history.py', 'api/status_history.py', None),
+          ('tracker/stream/opencv_stream.py', 'video_stream/opencv_stream.py', 'class OpenCVStream('),
+          ('tracker/engine/association.py', 'engine/association.py', 'import numpy as np'),
+          ('tracker/rendering.py', 'tracking2/apps/rendering.py', 'class FrameRenderer(')]
+
+
+def body(path, first_line):
+    with open(path) as source_file:
+        source = source_file.read()
+    if first_line is None:
+        return source
+    start = source.find('\n' + first_line)
+    assert start >= 0, '{} not found in {}'.format(first_line, path)
+    return source[start:]
+
+
+def main():
+    drifted = [(original, copy) for original, copy, first_line in COPIES
+               if body(original, first_line) != body(copy, first_line)]
+    for original, copy in drifted:
+        print('{} differs from {}'.format(copy, original))
+    return 1 if drifted else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
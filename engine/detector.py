@@ -65,32 +65,48 @@ class Detector(base_object_estimator.BaseObjectEstimator):
         # if self.model is None:
         #     self.initialize()
 
-        height, width = frame.shape[:2]
-
-        # print("predicting")
-        predict = self.model({'inputs': [frame]})
-        # print("predicted")
-        _objects = self._parse_prediction(predict)
-        _objects = self._scale_bbox(_objects, height, width)
-
-        self.objects = [base_object_estimator.TrackingObject(bbox_xmin=obj['detection_bbox_original'][0],
-                                                             bbox_ymin=obj['detection_bbox_original'][1],
-                                                             bbox_xmax=obj['detection_bbox_original'][2],
-                                                             bbox_ymax=obj['detection_bbox_original'][3],
-                                                             life=-1, tracker=None, obj_id=None,
-                                                             obj_type_id=obj['detection_class'],
-                                                             obj_type_name=self.id2name[obj['detection_class']],
-                                                             obj_score=obj['detection_score'])
-                        for obj in _objects]
+        self.objects = self.process_batch([frame])[0]
         return self.objects
 
-    def _parse_prediction(self, output_dict):
+    def process_batch(self, frames):
+        """ Detect objects on several images with a single predictor call
+
+            Args:
+                ``frames`` (list(numpy array)): Images, all of them with the same shape
+
+            Returns:
+                List with the detected objects of each image
+        """
+
+        height, width = frames[0].shape[:2]
+        assert all(f.shape == frames[0].shape for f in frames), "Frames of a batch must have the same shape"
+
+        predict = self.model({'inputs': np.stack(frames)})
+
+        batch_objects = []
+        for idx in range(len(frames)):
+            _objects = self._parse_prediction(predict, idx)
+            _objects = self._scale_bbox(_objects, height, width)
+
+            batch_objects.append([base_object_estimator.TrackingObject(bbox_xmin=obj['detection_bbox_original'][0],
+                                                                       bbox_ymin=obj['detection_bbox_original'][1],
+                                                                       bbox_xmax=obj['detection_bbox_original'][2],
+                                                                       bbox_ymax=obj['detection_bbox_original'][3],
+                                                                       life=-1, tracker=None, obj_id=None,
+                                                                       obj_type_id=obj['detection_class'],
+                                                                       obj_type_name=self.id2name[obj['detection_class']],
+                                                                       obj_score=obj['detection_score'])
+                                  for obj in _objects])
+        return batch_objects
+
+    def _parse_prediction(self, output_dict, idx=0):
         """ Parse `Tensorflow Object Detection API <https://github.com/tensorflow/models/tree/master/research/object_detection>`_ output bounding boxes.
 
             First, filter objects by prediction score and then by objects of interest.
 
             Args:
                 ``output_dict`` (dict): Output predictions by Object Detection API.
+                ``idx`` (int): Index of the image in the batch
 
             Returns:
                 ``parsed_pred`` (dict): Parsed and filtered objects
@@ -98,18 +114,18 @@ class Detector(base_object_estimator.BaseObjectEstimator):
 
         # filter objects by score
         idx_high = np.where(
-            output_dict['detection_scores'][0] >= self.threshold)[0]
+            output_dict['detection_scores'][idx] >= self.threshold)[0]
         
-        idx_object_ids = output_dict['detection_classes'][0][idx_high]
+        idx_object_ids = output_dict['detection_classes'][idx][idx_high]
         
 
         # filter objects by objects of interest
         idx_filtered_object_ids = np.where(
             np.isin(idx_object_ids, self.id2name.keys()))[0]        
 
-        detection_classes = output_dict['detection_classes'][0][idx_filtered_object_ids]
-        detection_scores = output_dict['detection_scores'][0][idx_filtered_object_ids]
-        detection_boxes = output_dict['detection_boxes'][0][idx_filtered_object_ids]
+        detection_classes = output_dict['detection_classes'][idx][idx_filtered_object_ids]
+        detection_scores = output_dict['detection_scores'][idx][idx_filtered_object_ids]
+        detection_boxes = output_dict['detection_boxes'][idx][idx_filtered_object_ids]
 
         parsed_pred = [{'detection_class': class_id, 'detection_score': score, 'detection_bbox': bbox}
                        for class_id, score, bbox in zip(detection_classes, detection_scores, detection_boxes)]
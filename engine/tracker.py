@@ -17,14 +17,13 @@ import numpy as np
 import detector
 from datetime import datetime
 import base_object_estimator
+import association
 
 import logging
 logging.basicConfig()
 logger = logging.getLogger('Object-Tracker')
 logger.setLevel(logging.INFO)
 
-from scipy.spatial.distance import euclidean
-
 class OpenCV_Tracker(base_object_estimator.BaseObjectEstimator):
 # class OpenCV_Tracker():
     """ Object tracker with OpenCV built-in methods
@@ -48,6 +47,7 @@ class OpenCV_Tracker(base_object_estimator.BaseObjectEstimator):
                 ``detector`` (object): An object detector derived from :class:`~engine.base_object_estimator.BaseObjectEstimator`
                 ``detection_rate`` (int): How many frames to perform tracking before the detection step
                 ``object_life_cycle`` (int): How many cycles (Detect & Track) to keep track of an object, even if detection fail.
+                ``min_iou`` (float): IoU above which a detection may always be paired with a tracked object
         """
 
         self.objects = list()
@@ -55,6 +55,7 @@ class OpenCV_Tracker(base_object_estimator.BaseObjectEstimator):
         self.detector = kw.get('detector', None)
         self.detection_rate = kw.get('detection_rate', 10)
         self.tracker_name = kw.get('tracker_name', 'csrt')
+        self.min_iou = kw.get('min_iou', 0.3)
         self.frame_idx = 0
 
         self.tracker_list = {
@@ -115,57 +116,40 @@ class OpenCV_Tracker(base_object_estimator.BaseObjectEstimator):
                 ``bboxes`` (list): list of bounding boxes coordinates (xmin, ymin, xmax, ymax)
         """
 
-        new_objects = []
-
         # Decrease life for all current objects
         for tracker in self.objects:
             tracker.life -= 1
 
-        # Update current objects and create new ones given new set of bboxes
-        for bbox in bboxes:
-            centroid = [(bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2]
-            distances = [euclidean(centroid, tracking_obj.centroid)
-                         for tracking_obj in self.objects]
-
-            if len(self.objects) > 0:
-                nearest_tracking_obj = np.argmin(distances)
-                min_dist = distances[nearest_tracking_obj]
-            else:
-                nearest_tracking_obj = None
-                min_dist = np.inf
-
-            # max_distance is given by half of the human height
-            max_distance = int((bbox[2] - bbox[0]) / 2)
-
-            if min_dist > max_distance:
-                logger.debug('new object')
-                start_time = datetime.now()
-                new_objects.append(base_object_estimator.TrackingObject(
-                    bbox[0], bbox[1], bbox[2], bbox[3],
-                    life=self.object_life_cycle,
-                    start_time=start_time,
-                    tracker=self.tracker_list[self.tracker_name]()))
-
-                new_objects[-1].tracker.init(frame,
-                                             (
-                                                 new_objects[-1].bbox_xmin,
-                                                 new_objects[-1].bbox_ymin,
-                                                 new_objects[-1].bbox_xmax -
-                                                 new_objects[-1].bbox_xmin,
-                                                 new_objects[-1].bbox_ymax -
-                                                 new_objects[-1].bbox_ymin
-                                             ))
-
-                # delete old tracker
-                if nearest_tracking_obj is not None:
-                    del self.objects[nearest_tracking_obj]
-
-            else:
-                self.objects[nearest_tracking_obj].update_bbox(
-                    bbox[0], bbox[1], bbox[2], bbox[3])
-                self.objects[nearest_tracking_obj].life += 1
-
-        self.objects += new_objects
+        # Pair detections and tracked objects, update the paired ones and create new ones for the rest
+        matches, unmatched_bboxes, _ = association.associate(
+            bboxes, [obj.bbox for obj in self.objects], min_iou=self.min_iou)
+
+        for bbox_idx, obj_idx in matches:
+            bbox = bboxes[bbox_idx]
+            self.objects[obj_idx].update_bbox(
+                bbox[0], bbox[1], bbox[2], bbox[3])
+            self.objects[obj_idx].life += 1
+
+        start_time = datetime.now()
+        for bbox_idx in unmatched_bboxes:
+            bbox = bboxes[bbox_idx]
+            logger.debug('new object')
+            new_object = base_object_estimator.TrackingObject(
+                bbox[0], bbox[1], bbox[2], bbox[3],
+                life=self.object_life_cycle,
+                start_time=start_time,
+                tracker=self.tracker_list[self.tracker_name]())
+
+            new_object.tracker.init(frame,
+                                    (
+                                        new_object.bbox_xmin,
+                                        new_object.bbox_ymin,
+                                        new_object.bbox_xmax -
+                                        new_object.bbox_xmin,
+                                        new_object.bbox_ymax -
+                                        new_object.bbox_ymin
+                                    ))
+            self.objects.append(new_object)
 
         return self._remove_dead_objects()
 
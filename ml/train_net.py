@@ -14,6 +14,7 @@ from utils import IMAGE_SIZE
 
 EPOCHS = 1000
 BATCH_SIZE = 4
+RAW_INPUT_KEY = 'frames'
 
 
 def preproc(image_bytes):
@@ -77,21 +78,40 @@ def get_serving_fn(window_size):
     return tf.estimator.export.build_raw_serving_input_receiver_fn(input_tensor)
 
 
+def get_tensor_serving_fn(window_size):
+    """ Serving input that takes the frames already resized, as a single uint8 tensor
+        of shape [batch, window, IMAGE_SIZE[0], IMAGE_SIZE[1], 3], instead of JPEG strings.
+        It skips the encode/decode round-trip (and its quality loss) at inference time.
+    """
+
+    def _serving_input_receiver_fn():
+        frames = tf.placeholder(
+            dtype=tf.uint8, shape=[None, window_size, IMAGE_SIZE[0], IMAGE_SIZE[1], 3], name=RAW_INPUT_KEY)
+        features = {RAW_INPUT_KEY: tf.to_float(frames) / 255.0}
+        return tf.estimator.export.ServingInputReceiver(features, {RAW_INPUT_KEY: frames})
+
+    return _serving_input_receiver_fn
+
+
 def model_fn(n_frames):
 
     def _model_fn(features, labels, mode, params):
 
-        input_tensors_list = []
+        if RAW_INPUT_KEY in features:
+            # [batch, window, height, width, 3] -> [batch, height, width, window, 3]
+            input_tensor_stream = tf.transpose(features[RAW_INPUT_KEY], [0, 2, 3, 1, 4])
+        else:
+            input_tensors_list = []
 
-        for i in range(n_frames):
-            frame_id = 'frame_{}'.format(i)
-            frame_tensor = tf.map_fn(preproc, features[frame_id], tf.float32)
-            frame_tensor = tf.expand_dims(frame_tensor, axis=-1)
-            frame_tensor = tf.transpose(frame_tensor, [0, 1, 2, 4, 3])
-            print(frame_tensor)
-            input_tensors_list.append(frame_tensor)
+            for i in range(n_frames):
+                frame_id = 'frame_{}'.format(i)
+                frame_tensor = tf.map_fn(preproc, features[frame_id], tf.float32)
+                frame_tensor = tf.expand_dims(frame_tensor, axis=-1)
+                frame_tensor = tf.transpose(frame_tensor, [0, 1, 2, 4, 3])
+                print(frame_tensor)
+                input_tensors_list.append(frame_tensor)
 
-        input_tensor_stream = tf.concat(input_tensors_list, axis=3)
+            input_tensor_stream = tf.concat(input_tensors_list, axis=3)
         print(input_tensor_stream)
 
         is_training = mode == tf.estimator.ModeKeys.TRAIN
@@ -174,6 +194,10 @@ if __name__ == '__main__':
                         dest='window_size',
                         type=int,
                         required=True)
+    parser.add_argument('--raw-export-dir',
+                        dest='raw_export_dir',
+                        type=str,
+                        required=False)
     args = parser.parse_args()
 
     tfrecord_list_train = args.train_tf_list.split(',')
@@ -219,3 +243,7 @@ if __name__ == '__main__':
 
     estimator.export_savedmodel(
         export_dir_base=args.output_dir, serving_input_receiver_fn=get_serving_fn(args.window_size))
+
+    if args.raw_export_dir:
+        estimator.export_savedmodel(
+            export_dir_base=args.raw_export_dir, serving_input_receiver_fn=get_tensor_serving_fn(args.window_size))
@@ -1,16 +1,24 @@
 import config
 import cv2
-import json
 import logging
 import numpy as np
 import os
-import time
+import threading
 
-from collections import deque
 from engine.classifier import MovementClassifier
 from engine.detector import Detector
 from engine.face_detector import FaceDetector
+from engine.rolling_stats import RollingStats
+from engine.scheduler import AdaptiveDetectionScheduler
+from engine.tracker import OpenCVTracker
+from engine.zone_map import ZoneMap, load_zones, stripe_zones
+from incident_recorder import IncidentRecorder, incident_reason
+from pipeline import BLOCK, DROP_OLDEST, END, Stage, StageQueue
+from rendering import FrameRenderer
 from stream.opencv_stream import OpenCVStream
+from status_history import StatusHistory, history_file_for
+from status_publisher import StatusPublisher
+from stream.shared_memory_stream import SharedFrameRing, SharedMemoryStream, start_capture_process
 
 logging.basicConfig()
 logger = logging.getLogger('People-Tracker-App')
@@ -20,167 +28,383 @@ FRAME_SIZE = (600, 800, 3)
 FRAME_AREA = FRAME_SIZE[0] * FRAME_SIZE[1]
 RESIZE_RATE = 3
 
-POOL_MASK = np.zeros(FRAME_SIZE)
-POOL_BORDER_W = int(FRAME_SIZE[1]*0.3)
-POOL_SECTOR_W = int(FRAME_SIZE[1]*0.1)
-POOL_MASK[:, :POOL_BORDER_W, 0] = 125  # BLUE
-POOL_MASK[:, :POOL_BORDER_W, 1] = 242  # GREEN
-POOL_MASK[:, :POOL_BORDER_W, 2] = 145  # RED
+# (start, end, (blue, green, red)), relative to the frame width
+POOL_BANDS = [(0., 0.3, (125, 242, 145)),
+              (0.3, 0.6, (96, 247, 242)),
+              (0.6, 1., (96, 109, 247))]
+# Used when there is no zone map file: ten vertical sectors, the deep end (red band) being the risk zone
+DEFAULT_ZONES = stripe_zones(10, POOL_BANDS, alert_from=0.6)
 
-POOL_MASK[:, POOL_BORDER_W:2*POOL_BORDER_W, 0] = 96   # BLUE
-POOL_MASK[:, POOL_BORDER_W:2*POOL_BORDER_W, 1] = 247  # GREEN
-POOL_MASK[:, POOL_BORDER_W:2*POOL_BORDER_W, 2] = 242  # RED
 
-POOL_MASK[:, 2*POOL_BORDER_W:, 0] = 96   # BLUE
-POOL_MASK[:, 2*POOL_BORDER_W:, 1] = 109  # GREEN
-POOL_MASK[:, 2*POOL_BORDER_W:, 2] = 247  # RED
+def build_zone_map(camera_id):
+    """ Zone map of a camera, loaded from ``config.ZONE_MAP_FILE`` if set
+    """
+    zones = DEFAULT_ZONES
+    if config.ZONE_MAP_FILE:
+        zones = load_zones(config.ZONE_MAP_FILE, camera_id)
+    return ZoneMap(zones, FRAME_SIZE)
+
+
+def build_tracker(detector, zone_map):
+    """ Wrap a detector with the Detect & Track cycle configured in :mod:`config`
+    """
+    scheduler = None
+    if config.ADAPTIVE_DETECTION:
+        scheduler = AdaptiveDetectionScheduler(min_rate=config.DETECTION_MIN_RATE, calm_rate=config.DETECTION_RATE,
+                                               max_rate=config.DETECTION_MAX_RATE,
+                                               latency_budget_ms=config.LATENCY_BUDGET_MS)
+    return OpenCVTracker(detector=detector, detection_rate=config.DETECTION_RATE,
+                         object_life_cycle=config.OBJECT_LIFECYCLE, tracker_name=config.TRACKER_NAME,
+                         n_threads=config.TRACKER_THREADS, scheduler=scheduler, risk_zone=zone_map.alert, rgb=True)
+
+
+def build_face_detector():
+    """ Face detector configured in :mod:`config`
+    """
+    return FaceDetector(roi=config.FACE_DETECTION_ROI, scale=config.FACE_DETECTION_SCALE,
+                        scale_factor=config.FACE_DETECTION_SCALE_FACTOR, max_skip=config.FACE_DETECTION_MAX_SKIP)
 
 
 class CameraApp:
     """ App
     """
 
-    def __init__(self, video_stream, object_estimator, movement_classifier, face_detector):
+    def __init__(self, video_stream, object_estimator, movement_classifier, face_detector, camera_id=None,
+                 status_file=None, zone_map=None):
         self.video_stream = video_stream
         self.object_estimator = object_estimator
         self.movement_classifier = movement_classifier
         self.face_detector = face_detector
+        self.camera_id = camera_id
+        self.status_file = status_file or os.getenv('STATUS_FILE', '../status.json')
+        history = None
+        if config.STATUS_HISTORY_FILE:
+            history = StatusHistory(history_file_for(config.STATUS_HISTORY_FILE, camera_id),
+                                    capacity=config.STATUS_HISTORY_SIZE,
+                                    interval=config.STATUS_HISTORY_INTERVAL_MS / 1000.,
+                                    underwater_seconds=config.INCIDENT_UNDERWATER_SECS)
+        self.status_publisher = StatusPublisher(self.status_file, interval=config.STATUS_PUBLISH_INTERVAL_MS / 1000.,
+                                                socket_path=config.STATUS_SOCKET, history=history)
+        self.incident_recorder = None
+        if config.INCIDENT_DIR:
+            self.incident_recorder = IncidentRecorder(config.INCIDENT_DIR, camera=camera_id,
+                                                      pre_roll=config.INCIDENT_PRE_ROLL_SECS,
+                                                      post_roll=config.INCIDENT_POST_ROLL_SECS, fps=config.INCIDENT_FPS,
+                                                      quality=config.INCIDENT_JPEG_QUALITY)
         self.status = {}
-        self.bbox_area_queue = deque(maxlen=10)
+        if camera_id is not None:
+            self.status['camera'] = camera_id
+        if config.POOL_ID:
+            self.status['pool'] = config.POOL_ID
+        self.area_stats = RollingStats(window=10)
+        self.track_windows = {}
+        self.zone_map = zone_map or ZoneMap(DEFAULT_ZONES, FRAME_SIZE)
+        self.renderer = FrameRenderer(self.zone_map.mask)
 
     def run(self):
         """ Run App
-
-            Args:
-                ``display`` (bool): Whether or not
         """
 
         self.video_stream.initialize()
-        frame_buffer = None
+        self.status_publisher.start()
+        if self.incident_recorder is not None:
+            self.incident_recorder.start()
         while True:
             frame = self.video_stream.next_frame()
             if frame is None:
                 break
-            if not frame_buffer:
-                frame_buffer = deque([frame] * config.FRAME_BUFFER_SIZE, maxlen=config.FRAME_BUFFER_SIZE)
-            frame = cv2.flip(frame, 1)
-            frame = cv2.resize(frame, (FRAME_SIZE[1], FRAME_SIZE[0]))
-            frame_buffer.append(frame)
+            timestamp = self.video_stream.timestamp
+            frame = self._prepare_frame(frame)
+            self._record(frame, timestamp)
             # Check main subject position
             self.object_estimator.process(frame)
+            objects = self.object_estimator.objects
+            bboxes, track_ids = [obj.bbox for obj in objects], [obj.obj_id for obj in objects]
+            panic_scores = self.classify_tracks(frame)
             # detect face
-            frame, secs = self.face_detector.process(frame)
-            self.update_status(secs)
-            frame = self._draw_bbox(
-                frame, [obj.bbox for obj in self.object_estimator.objects])
-            self.write_label(frame)
-            if config.DISPLAY:
-                frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-                frame = (0.6 * frame + 0.4 * POOL_MASK).astype(np.uint8)
-                cv2.imshow('Human-Tracking-CameraApp', frame)
-                if cv2.waitKey(1) & 0xFF == ord('q'):
-                    break
+            frame, secs = self.face_detector.process(frame, bboxes, track_ids, timestamp)
+            self.update_status(secs, bboxes, panic_scores, track_ids, timestamp)
+            if not self._render(frame, bboxes, self.status):
+                break
+        self.status_publisher.stop()
+        if self.incident_recorder is not None:
+            self.incident_recorder.stop()
         cv2.destroyAllWindows()
 
-    def update_status(self, time_active):
-        main_obj, cnt, main_obj_area = self.get_main_bbox()
-        if main_obj:
-            self.get_main_object_sector(main_obj)
-            self.get_panic_score(main_obj_area)
-            self.status['faceWaterSeconds'] = time_active
-            self.write_status_to_file()
-
-    def get_main_bbox(self):
-        cur_area = 0
-        main_object = None
-        contour = None
+    def run_pipelined(self, queue_size=2):
+        """ Run App as a pipeline: capture, detection & tracking and face detection run on their own
+            threads, connected by bounded queues, while rendering runs on the calling thread.
+            Detection of frame N then overlaps capture of N+1 and rendering of N-1.
+
+            Capture drops the oldest queued frame when detection falls behind, so detection always
+            gets the freshest one. Rendering does the same with processed frames. Detection and face
+            detection are connected by a blocking queue, so every tracked frame gets a status update.
+
+            Args:
+                ``queue_size`` (int): Size of the queues between stages
+
+            Raises:
+                The exception of the first failed stage, if any, once all the stages are stopped
+        """
+
+        stop_event = threading.Event()
+        detect_queue = StageQueue(queue_size, DROP_OLDEST, stop_event)
+        face_queue = StageQueue(queue_size, BLOCK, stop_event)
+        render_queue = StageQueue(queue_size, DROP_OLDEST, stop_event)
+
+        def capture():
+            frame = self.video_stream.next_frame()
+            if frame is None:
+                return END
+            frame, timestamp = self._prepare_frame(frame), self.video_stream.timestamp
+            self._record(frame, timestamp)
+            return frame, timestamp
+
+        def detect(item):
+            frame, timestamp = item
+            self.object_estimator.process(frame)
+            objects = self.object_estimator.objects
+            bboxes, track_ids = [obj.bbox for obj in objects], [obj.obj_id for obj in objects]
+            return frame, timestamp, bboxes, track_ids, self.classify_tracks(frame)
+
+        def face(item):
+            frame, timestamp, bboxes, track_ids, panic_scores = item
+            frame, secs = self.face_detector.process(frame, bboxes, track_ids, timestamp)
+            self.update_status(secs, bboxes, panic_scores, track_ids, timestamp)
+            return frame, bboxes, dict(self.status)
+
+        self.video_stream.initialize()
+        self.status_publisher.start()
+        if self.incident_recorder is not None:
+            self.incident_recorder.start()
+        stages = [Stage('Capture', capture, None, detect_queue, stop_event),
+                  Stage('Detect', detect, detect_queue, face_queue, stop_event),
+                  Stage('Face', face, face_queue, render_queue, stop_event)]
+        for stage in stages:
+            stage.start()
+
+        while True:
+            item = render_queue.get()
+            if item is END:
+                break
+            frame, bboxes, status = item
+            if not self._render(frame, bboxes, status):
+                break
+
+        stop_event.set()
+        for stage in stages:
+            stage.join()
+        self.status_publisher.stop()
+        if self.incident_recorder is not None:
+            self.incident_recorder.stop()
+        cv2.destroyAllWindows()
+        logger.info('Frames dropped before detection: {}, before rendering: {}'.format(
+            detect_queue.dropped, render_queue.dropped))
+        for stage in stages:
+            if stage.error is not None:
+                raise stage.error
+
+    def _prepare_frame(self, frame):
+        """ Mirror and resize a captured frame
+        """
+        frame = cv2.flip(frame, 1)
+        frame = cv2.resize(frame, (FRAME_SIZE[1], FRAME_SIZE[0]))
+        return frame
+
+    def _record(self, frame, timestamp):
+        """ Hand the frame over to the incident recorder, if any, before anything is drawn on it
+        """
+        if self.incident_recorder is not None:
+            self.incident_recorder.push(frame, timestamp)
+
+    def classify_tracks(self, frame):
+        """ Push the crop of every tracked person to its own movement window, keyed by track id,
+            and score every full window with a single movement classifier call.
+            Windows of tracks that are gone are discarded.
+
+            Args:
+                ``frame`` (numpy array): frame the tracker was just updated with
+
+            Returns:
+                Dict of track id to panic score, for the tracks with a full window
+        """
+        height, width = frame.shape[:2]
+        windows = {}
         for obj in self.object_estimator.objects:
-            if obj.bbox:
-                xmin, ymin, xmax, ymax = obj.bbox[0], obj.bbox[1], obj.bbox[2], obj.bbox[3]
-                contour = np.array([[[xmin, ymin]], [[xmax, ymin]], [[xmax, ymax]], [[xmin, ymax]]])
-                area = cv2.contourArea(contour)
-                if area > cur_area:
-                    main_object = obj
-                    cur_area = area
+            xmin, ymin = max(obj.bbox_xmin, 0), max(obj.bbox_ymin, 0)
+            xmax, ymax = min(obj.bbox_xmax, width), min(obj.bbox_ymax, height)
+            window = self.track_windows.get(obj.obj_id)
+            if window is None:
+                window = self.movement_classifier.new_window(fill=False)
+            if xmax > xmin and ymax > ymin:
+                window.push(frame[ymin:ymax, xmin:xmax])
+            windows[obj.obj_id] = window
+        self.track_windows = windows
+
+        ready = [obj_id for obj_id, window in windows.items() if window.full]
+        scores = self.movement_classifier.predict_batch([windows[obj_id] for obj_id in ready])
+        return dict(zip(ready, scores))
+
+    def _render(self, frame, bboxes, status):
+        """ Draw bboxes and labels and display the frame
+
+            Returns:
+                ``False`` if the user asked to quit
+        """
+        if config.DISPLAY:
+            frame = self.renderer.render(frame, bboxes, self.get_labels(status))
+            cv2.imshow(self.window_name, frame)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                return False
+        return True
+
+    @property
+    def window_name(self):
+        if self.camera_id is None:
+            return 'Human-Tracking-CameraApp'
+        return 'Human-Tracking-CameraApp-{}'.format(self.camera_id)
+
+    def update_status(self, underwater_secs, bboxes, panic_scores=None, track_ids=None, timestamp=None):
+        """ Update the status with the main subject and the per track scores, and trigger
+            the incident recorder if any track is at risk
+
+            Args:
+                ``underwater_secs`` (np.array): seconds the face of every track has been in the water
+                ``bboxes`` (list(tuple)): bboxes of every track
+                ``panic_scores`` (dict): movement panic score by track id
+                ``track_ids`` (list(int)): track ids of ``bboxes``
+                ``timestamp`` (float): timestamp of the frame, in seconds
+        """
+        if track_ids is None:
+            track_ids = list(range(len(bboxes)))
+        boxes = np.asarray(bboxes, dtype=float).reshape(-1, 4)
+        areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+        # every track keeps feeding its statistics, whether it is the main subject or not
+        risk_panic = self.get_panic_score(self.area_stats.update(track_ids, areas / FRAME_AREA))
+
+        main_idx = self.get_main_bbox(bboxes, areas)
+        if main_idx is not None:
+            self.get_main_object_sector(bboxes[main_idx])
+            self.status['riskPanic'] = int(risk_panic[main_idx])
+            self.status['faceWaterSeconds'] = round(float(underwater_secs[main_idx]), 2)
+            self.status['trackZones'] = self.get_track_zones(bboxes, track_ids)
+            self.status['trackRiskPanic'] = {str(obj_id): int(risk) for obj_id, risk in zip(track_ids, risk_panic)}
+            self.status['trackUnderwaterSeconds'] = {str(obj_id): round(float(secs), 2)
+                                                     for obj_id, secs in zip(track_ids, underwater_secs)}
+            self.status['trackPanic'] = {str(obj_id): round(float(score), 2)
+                                         for obj_id, score in (panic_scores or {}).items()}
+            self.status_publisher.publish(self.status)
+            if self.incident_recorder is not None and timestamp is not None:
+                reason = self.get_incident_reason(boxes, track_ids, risk_panic, underwater_secs)
+                if reason:
+                    self.incident_recorder.trigger(timestamp, reason)
+
+    def get_incident_reason(self, boxes, track_ids, risk_panic, underwater_secs):
+        """ Check whether a track is at risk, with the thresholds of :mod:`config`, see
+            :func:`~incident_recorder.incident_reason`
+
+            Args:
+                ``boxes`` (np.array): ``(N, 4)`` bboxes of every track
+                ``track_ids`` (list(int)): track ids of ``boxes``
+                ``risk_panic`` (np.array): ``(N,)`` panic risks
+                ``underwater_secs`` (np.array): ``(N,)`` seconds the face of every track has been in the water
+
+            Returns:
+                What is wrong, ``None`` if nothing is
+        """
+        centroids = (boxes[:, :2] + boxes[:, 2:]) / 2
+        return incident_reason(track_ids, underwater_secs, risk_panic, self.zone_map.alert(centroids),
+                               self.zone_map.zone_names(centroids), config.INCIDENT_UNDERWATER_SECS,
+                               config.INCIDENT_RISK_PANIC)
+
+    def get_main_bbox(self, bboxes, areas):
+        """ Pick the largest bbox as the main subject
+
+            Args:
+                ``bboxes`` (list(tuple)): bboxes of every track
+                ``areas`` (np.array): ``(N,)`` areas of ``bboxes``
+
+            Returns:
+                Index of the main bbox, ``None`` if there is none
+        """
         self.status['subject'] = {}
-        if main_object:
-            self.status['subject'] = {
-                'xmin': main_object.bbox[0],
-                'xmax': main_object.bbox[2],
-                'ymin': main_object.bbox[1],
-                'ymax': main_object.bbox[3]
-            }
-        return main_object, contour, cur_area
-
-    def get_main_object_sector(self, main_object):
-        cx = (main_object.bbox[2] - main_object.bbox[0])/2 + main_object.bbox[0]
-        obj_sector = int(cx/POOL_SECTOR_W) * 10
+        if len(areas) == 0 or areas.max() <= 0:
+            return None
+        main_idx = int(np.argmax(areas))
+        main_bbox = bboxes[main_idx]
+        self.status['subject'] = {
+            'xmin': int(main_bbox[0]),
+            'xmax': int(main_bbox[2]),
+            'ymin': int(main_bbox[1]),
+            'ymax': int(main_bbox[3])
+        }
+        return main_idx
+
+    def get_main_object_sector(self, main_bbox):
+        cx = (main_bbox[2] - main_bbox[0])/2 + main_bbox[0]
+        cy = (main_bbox[3] - main_bbox[1])/2 + main_bbox[1]
+        label = self.zone_map.lookup([(cx, cy)])[0]
+        obj_sector = int(self.zone_map.risks[label])
         self.status['riskPosition'] = obj_sector
+        self.status['zone'] = self.zone_map.names[label]
         self.status['cx'] = cx
         return obj_sector
 
-    def get_panic_score(self, main_obj_area):
-        main_obj_area = main_obj_area / FRAME_AREA
-        self.bbox_area_queue.append(main_obj_area)
-        panic_score = np.std(self.bbox_area_queue)
-        if panic_score > config.PANIC_THRESHOLD:
-            self.status['riskPanic'] = 75
-        else:
-            self.status['riskPanic'] = 30
-        return panic_score
-
-    def write_label(self, frame):
-        if self.status.get('subject', None) and self.status.get('cx', '') and self.status.get('riskPosition', ''):
-            xmin_label = 'xmin: {}'.format(self.status.get('subject').get('xmin'))
-            xmax_label = 'xmax: {}'.format(self.status.get('subject').get('xmax'))
-            cx_label = 'cx: {}'.format(self.status.get('cx', ''))
-            sector_label = 'sector: {}'.format(self.status.get('riskPosition', ''))
-            panic_score_label = 'panic score: {}'.format(self.status.get('riskPanic', ''))
-            timer_label = 'time under water: {}'.format(self.status.get('faceWaterSeconds', ''))
-            cv2.putText(frame, xmin_label, (20, 20), cv2.FONT_HERSHEY_DUPLEX, 0.5, (255, 255, 255),
-                        lineType=cv2.LINE_AA)
-            cv2.putText(frame, xmax_label, (20, 35), cv2.FONT_HERSHEY_DUPLEX, 0.5, (255, 255, 255),
-                        lineType=cv2.LINE_AA)
-            cv2.putText(frame, cx_label, (20, 50), cv2.FONT_HERSHEY_DUPLEX, 0.5, (255, 255, 255),
-                        lineType=cv2.LINE_AA)
-            cv2.putText(frame, sector_label, (20, 65), cv2.FONT_HERSHEY_DUPLEX, 0.5, (255, 255, 255),
-                        lineType=cv2.LINE_AA)
-            cv2.putText(frame, panic_score_label, (20, 80), cv2.FONT_HERSHEY_DUPLEX, 0.5, (255, 255, 255),
-                        lineType=cv2.LINE_AA)
-            cv2.putText(frame, timer_label, (20, 95), cv2.FONT_HERSHEY_DUPLEX, 0.5, (255, 255, 255),
-                        lineType=cv2.LINE_AA)
-
-    def write_status_to_file(self):
-        self.status['updatedAt'] = int(round(time.time() * 1000))
-        output_path = os.getenv('STATUS_FILE', '../status.json')
-        with open(output_path, 'w') as outfile:
-            json.dump(self.status, outfile)
+    def get_track_zones(self, bboxes, track_ids):
+        """ Zone of every track, by track id, looked up from the bbox centroids at once
+        """
+        if not bboxes:
+            return {}
+        bboxes = np.asarray(bboxes, dtype=float)
+        names = self.zone_map.zone_names((bboxes[:, :2] + bboxes[:, 2:]) / 2)
+        return {str(obj_id): name for obj_id, name in zip(track_ids, names)}
 
     @staticmethod
-    def _draw_bbox(frame, bboxes):
-        """ Draw bounding boxes on current frame
+    def get_panic_score(area_std):
+        """ Panic risk of every track, given by how much its relative bbox area varies
 
             Args:
-
-                ``frame`` (numpy array): image
-                ``bboxes`` (list(tuple)): bboxes coordinates in the form (xmin,xmax,ymin,ymax)
+                ``area_std`` (np.array): ``(N,)`` rolling standard deviation of the bbox areas
 
             Returns:
-                Image (numpy array) with bouding boxes drawn
+                ``(N,)`` panic risks
+        """
+        return np.where(area_std > config.PANIC_THRESHOLD, 75, 30)
+
+    @staticmethod
+    def get_labels(status):
+        """ Returns the text lines describing ``status``, to be drawn on the frame
         """
-        rect_frame = frame
-        for bbox in bboxes:
-            pt1 = (bbox[0], bbox[1])
-            pt2 = (bbox[2], bbox[3])
-            rect_frame = cv2.rectangle(rect_frame, pt1, pt2, (34, 34, 178), thickness=2)
-        return rect_frame
+        if not (status.get('subject', None) and status.get('cx', '') and status.get('riskPosition', '')):
+            return []
+        return ['xmin: {}'.format(status.get('subject').get('xmin')),
+                'xmax: {}'.format(status.get('subject').get('xmax')),
+                'cx: {}'.format(status.get('cx', '')),
+                'sector: {}'.format(status.get('riskPosition', '')),
+                'panic score: {}'.format(status.get('riskPanic', '')),
+                'time under water: {}'.format(status.get('faceWaterSeconds', ''))]
 
 
 def start():
-    video_stream = OpenCVStream(config.CAMERA_ID)
+    if config.CAPTURE_PROCESS:
+        ring = SharedFrameRing(FRAME_SIZE, slots=config.SHARED_MEMORY_SLOTS)
+        start_capture_process(ring, config.CAMERA_ID, threaded=config.CAPTURE_THREADED,
+                              buffer_size=config.CAPTURE_BUFFER_SIZE)
+        video_stream = SharedMemoryStream(ring)
+    else:
+        video_stream = OpenCVStream(config.CAMERA_ID, threaded=config.CAPTURE_THREADED,
+                                    buffer_size=config.CAPTURE_BUFFER_SIZE)
     detector = Detector(model_path=config.TRACKER_MODEL_PATH, id2name=config.ID_TO_NAME, threshold=0.5)
-    movement_classifier = MovementClassifier(model_path=config.MOVEMENT_CLASSIFIER_MODEL_PATH, threshold=0.5)
-    face_detector = FaceDetector()
-    app = CameraApp(video_stream=video_stream, object_estimator=detector, movement_classifier=movement_classifier,
-                    face_detector=face_detector)
-    app.run()
+    zone_map = build_zone_map(config.CAMERA_ID)
+    movement_classifier = MovementClassifier(model_path=config.MOVEMENT_CLASSIFIER_MODEL_PATH, threshold=0.5,
+                                             raw_input=config.MOVEMENT_CLASSIFIER_RAW_INPUT,
+                                             window_size=config.FRAME_BUFFER_SIZE)
+    face_detector = build_face_detector()
+    app = CameraApp(video_stream=video_stream, object_estimator=build_tracker(detector, zone_map),
+                    movement_classifier=movement_classifier,
+                    face_detector=face_detector, camera_id=config.CAMERA_ID, zone_map=zone_map)
+    if config.PIPELINED:
+        app.run_pipelined(queue_size=config.PIPELINE_QUEUE_SIZE)
+    else:
+        app.run()
+    logger.info('Frames dropped: {}'.format(video_stream.frames_dropped))
@@ -2,16 +2,49 @@ import os
 
 
 CAMERA_ID = os.getenv('CAMERA_ID', 0)
-DETECTION_RATE = os.getenv('DETECTION_RATE', 3)
+CAMERA_IDS = [int(c) if c.isdigit() else c for c in os.getenv('CAMERA_IDS', '').split(',') if c]
+POOL_ID = os.getenv('POOL_ID', '')
+CAPTURE_THREADED = int(os.getenv('CAPTURE_THREADED', 0))
+CAPTURE_BUFFER_SIZE = int(os.getenv('CAPTURE_BUFFER_SIZE', 1))
+CAPTURE_PROCESS = int(os.getenv('CAPTURE_PROCESS', 0))
+SHARED_MEMORY_SLOTS = int(os.getenv('SHARED_MEMORY_SLOTS', 8))
+DETECTION_RATE = int(os.getenv('DETECTION_RATE', 3))
+ADAPTIVE_DETECTION = int(os.getenv('ADAPTIVE_DETECTION', 0))
+DETECTION_MIN_RATE = int(os.getenv('DETECTION_MIN_RATE', 2))
+DETECTION_MAX_RATE = int(os.getenv('DETECTION_MAX_RATE', 30))
+LATENCY_BUDGET_MS = float(os.getenv('LATENCY_BUDGET_MS', 66))
+DETECTION_BATCH_SIZE = int(os.getenv('DETECTION_BATCH_SIZE', 0)) or None
+DETECTION_BATCH_WAIT_MS = float(os.getenv('DETECTION_BATCH_WAIT_MS', 10))
 DISPLAY = os.getenv('DISPLAY', 1)
+PIPELINED = int(os.getenv('PIPELINED', 0))
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', 2))
 ID_TO_NAME = {1: 'person'}
 TRACKER_MODEL_PATH = os.getenv('TRACKER_MODEL_PATH', 'model/ssd_mobilenet_v1_coco_2018_01_28/saved_model')
 MOVEMENT_CLASSIFIER_MODEL_PATH = os.getenv('MOVEMENT_CLASSIFIER_MODEL_PATH', 'model/movement_classifier/saved_model/v1')
-OBJECT_LIFECYCLE = os.getenv('OBJECT_LIFECYCLE', 3)
+MOVEMENT_CLASSIFIER_RAW_INPUT = int(os.getenv('MOVEMENT_CLASSIFIER_RAW_INPUT', 0))
+OBJECT_LIFECYCLE = int(os.getenv('OBJECT_LIFECYCLE', 3))
 TRACKER_NAME = os.getenv('TRACKER_NAME', 'kcf')
+TRACKER_THREADS = int(os.getenv('TRACKER_THREADS', 0))
 WINDOW_SIZE_SECS = os.getenv('WINDOW_SIZE_SECS', 60)
-FRAME_BUFFER_SIZE = os.getenv('FRAME_BUFFER_SIZE', 16)
+FRAME_BUFFER_SIZE = int(os.getenv('FRAME_BUFFER_SIZE', 16))
 STATUS_FILE = os.getenv('STATUS_FILE', '/data/status.json')
+STATUS_PUBLISH_INTERVAL_MS = float(os.getenv('STATUS_PUBLISH_INTERVAL_MS', 200))
+STATUS_SOCKET = os.getenv('STATUS_SOCKET', '')
+STATUS_HISTORY_FILE = os.getenv('STATUS_HISTORY_FILE', '')
+STATUS_HISTORY_SIZE = int(os.getenv('STATUS_HISTORY_SIZE', 86400))
+STATUS_HISTORY_INTERVAL_MS = float(os.getenv('STATUS_HISTORY_INTERVAL_MS', 1000))
 CASCADE_CLASSIFIER_PATH = os.getenv('CASCADE_CLASSIFIER_PATH', 'model/haarcascade_frontalface_default.xml')
-PANIC_THRESHOLD = os.getenv('PANIC_THRESHOLD', 0.04)
+FACE_DETECTION_ROI = int(os.getenv('FACE_DETECTION_ROI', 0))
+FACE_DETECTION_SCALE = float(os.getenv('FACE_DETECTION_SCALE', 0.5))
+FACE_DETECTION_SCALE_FACTOR = float(os.getenv('FACE_DETECTION_SCALE_FACTOR', 1.3))
+FACE_DETECTION_MAX_SKIP = int(os.getenv('FACE_DETECTION_MAX_SKIP', 3))
+PANIC_THRESHOLD = float(os.getenv('PANIC_THRESHOLD', 0.04))
+ZONE_MAP_FILE = os.getenv('ZONE_MAP_FILE', '')
+INCIDENT_DIR = os.getenv('INCIDENT_DIR', '')
+INCIDENT_PRE_ROLL_SECS = float(os.getenv('INCIDENT_PRE_ROLL_SECS', 10))
+INCIDENT_POST_ROLL_SECS = float(os.getenv('INCIDENT_POST_ROLL_SECS', 10))
+INCIDENT_FPS = float(os.getenv('INCIDENT_FPS', 10))
+INCIDENT_JPEG_QUALITY = int(os.getenv('INCIDENT_JPEG_QUALITY', 80))
+INCIDENT_UNDERWATER_SECS = float(os.getenv('INCIDENT_UNDERWATER_SECS', 10))
+INCIDENT_RISK_PANIC = int(os.getenv('INCIDENT_RISK_PANIC', 75))
 
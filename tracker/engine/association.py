@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from scipy.optimize import linear_sum_assignment
+
+# Cost given to gated (forbidden) pairs. Any valid pair costs less than 2
+_INVALID_COST = 1e6
+
+
+def iou_matrix(bboxes_a, bboxes_b):
+    """ Intersection over union of every pair of bounding boxes
+
+        Args:
+            ``bboxes_a`` (np.array): ``(N, 4)`` bboxes (xmin, ymin, xmax, ymax)
+            ``bboxes_b`` (np.array): ``(M, 4)`` bboxes (xmin, ymin, xmax, ymax)
+
+        Returns:
+            ``(N, M)`` IoU matrix
+    """
+    a = np.asarray(bboxes_a, dtype=float).reshape(-1, 4)[:, None, :]
+    b = np.asarray(bboxes_b, dtype=float).reshape(-1, 4)[None, :, :]
+    inter_w = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    inter_h = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = inter_w * inter_h
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    union = area_a + area_b - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.)
+
+
+def centroid_distance_matrix(bboxes_a, bboxes_b):
+    """ Euclidean distance between the centroids of every pair of bounding boxes
+
+        Returns:
+            ``(N, M)`` distance matrix
+    """
+    a = np.asarray(bboxes_a, dtype=float).reshape(-1, 4)
+    b = np.asarray(bboxes_b, dtype=float).reshape(-1, 4)
+    ca = (a[:, :2] + a[:, 2:]) / 2
+    cb = (b[:, :2] + b[:, 2:]) / 2
+    return np.linalg.norm(ca[:, None, :] - cb[None, :, :], axis=2)
+
+
+def associate(detections, tracks, min_iou=0.3):
+    """ Optimal assignment of detections to tracks
+
+        The cost of a pair is ``1 - IoU`` plus the centroid distance normalized by the gate,
+        solved by the Hungarian method. Pairs are gated: they are only allowed when their IoU is
+        at least ``min_iou`` or their centroids are closer than half of the detection width.
+
+        Args:
+            ``detections`` (np.array): ``(N, 4)`` detected bboxes (xmin, ymin, xmax, ymax)
+            ``tracks`` (np.array): ``(M, 4)`` tracked bboxes (xmin, ymin, xmax, ymax)
+            ``min_iou`` (float): IoU above which a pair is always allowed
+
+        Returns:
+            Tuple of matched ``(K, 2)`` (detection, track) index array, unmatched detection indexes
+            and unmatched track indexes
+    """
+    detections = np.asarray(detections, dtype=float).reshape(-1, 4)
+    tracks = np.asarray(tracks, dtype=float).reshape(-1, 4)
+    n_det, n_trk = len(detections), len(tracks)
+    if n_det == 0 or n_trk == 0:
+        return np.zeros((0, 2), dtype=int), np.arange(n_det), np.arange(n_trk)
+
+    iou = iou_matrix(detections, tracks)
+    max_distance = np.maximum((detections[:, 2] - detections[:, 0]) / 2, 1.)[:, None]
+    distance = centroid_distance_matrix(detections, tracks) / max_distance
+
+    valid = (iou >= min_iou) | (distance <= 1.)
+    cost = np.where(valid, 1. - iou + np.minimum(distance, 1.), _INVALID_COST)
+    det_idx, trk_idx = linear_sum_assignment(cost)
+    keep = valid[det_idx, trk_idx]
+    matches = np.stack([det_idx[keep], trk_idx[keep]], axis=1)
+
+    unmatched_det = np.setdiff1d(np.arange(n_det), matches[:, 0])
+    unmatched_trk = np.setdiff1d(np.arange(n_trk), matches[:, 1])
+    return matches, unmatched_det, unmatched_trk
@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 
 import abc
+import numpy as np
+
+from datetime import datetime
 
 
 class TrackingObject(object):
@@ -84,6 +87,197 @@ class TrackingObject(object):
         return s
 
 
+class TrackedObject(TrackingObject):
+    """ Lightweight view of a row of a :class:`TrackTable`
+
+        It exposes the :class:`TrackingObject` interface, reading and writing the table arrays.
+        A view is only valid until rows are added to or removed from its table.
+    """
+
+    def __init__(self, table, index):
+        """ Constructor
+
+            Args:
+                ``table`` (:class:`TrackTable`): table holding the object
+                ``index`` (int): row of the object
+        """
+        self._table = table
+        self._index = index
+
+    @property
+    def bbox_xmin(self):
+        return int(self._table.bboxes[self._index, 0])
+
+    @property
+    def bbox_ymin(self):
+        return int(self._table.bboxes[self._index, 1])
+
+    @property
+    def bbox_xmax(self):
+        return int(self._table.bboxes[self._index, 2])
+
+    @property
+    def bbox_ymax(self):
+        return int(self._table.bboxes[self._index, 3])
+
+    @property
+    def bbox(self):
+        return tuple(self._table.bboxes[self._index].tolist())
+
+    @property
+    def life(self):
+        return int(self._table.life[self._index])
+
+    @life.setter
+    def life(self, value):
+        self._table.life[self._index] = value
+
+    @property
+    def tracker(self):
+        return self._table.trackers[self._index]
+
+    @property
+    def obj_id(self):
+        return int(self._table.ids[self._index])
+
+    @property
+    def obj_type_id(self):
+        type_id = int(self._table.type_ids[self._index])
+        return type_id if type_id >= 0 else None
+
+    @property
+    def obj_type_name(self):
+        return None
+
+    @property
+    def obj_score(self):
+        return float(self._table.scores[self._index])
+
+    @property
+    def start_time(self):
+        return datetime.fromtimestamp(self._table.start_times[self._index])
+
+    def update_bbox(self, bbox_xmin, bbox_ymin, bbox_xmax, bbox_ymax):
+        self._table.bboxes[self._index] = (bbox_xmin, bbox_ymin, bbox_xmax, bbox_ymax)
+
+
+class TrackTable(object):
+    """ Struct-of-arrays store of tracked objects.
+
+        Each field is a contiguous array with one row per object, so life decrement, dead object
+        removal or centroid computation are single NumPy operations over all of them.
+        Rows keep their insertion order, :meth:`remove` compacts the arrays.
+        Iterating or indexing the table yields :class:`TrackedObject` views.
+    """
+
+    def __init__(self):
+        """ Constructor
+        """
+        self.bboxes = np.zeros((0, 4), dtype=int)
+        self.life = np.zeros(0, dtype=int)
+        self.scores = np.zeros(0)
+        self.type_ids = np.zeros(0, dtype=int)
+        self.start_times = np.zeros(0)
+        self.ids = np.zeros(0, dtype=int)
+        self.trackers = []
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        return TrackedObject(self, index)
+
+    def __iter__(self):
+        return (TrackedObject(self, i) for i in range(len(self)))
+
+    @property
+    def centroids(self):
+        """ Returns the ``(N, 2)`` centroids (x, y) of all objects
+        """
+        return (self.bboxes[:, :2] + self.bboxes[:, 2:]) / 2.
+
+    def add(self, bboxes, life, start_time, trackers=None, scores=None, type_ids=None):
+        """ Add new objects
+
+            Args:
+                ``bboxes`` (np.array): ``(K, 4)`` bboxes (xmin, ymin, xmax, ymax)
+                ``life`` (int): life of the new objects
+                ``start_time`` (float): timestamp (seconds since epoch) the objects were first seen
+                ``trackers`` (list): object trackers, if any
+                ``scores`` (np.array): ``(K,)`` detection confidences, if any
+                ``type_ids`` (np.array): ``(K,)`` object type ids, if any (``-1`` when unknown)
+
+            Returns:
+                Ids of the new objects
+        """
+        bboxes = np.asarray(bboxes, dtype=int).reshape(-1, 4)
+        n = len(bboxes)
+        ids = np.arange(self._next_id, self._next_id + n)
+        self._next_id += n
+
+        self.bboxes = np.vstack([self.bboxes, bboxes])
+        self.life = np.append(self.life, np.full(n, life, dtype=int))
+        self.scores = np.append(self.scores, np.zeros(n) if scores is None else scores)
+        self.type_ids = np.append(self.type_ids, np.full(n, -1, dtype=int) if type_ids is None else type_ids)
+        self.start_times = np.append(self.start_times, np.full(n, start_time))
+        self.ids = np.append(self.ids, ids)
+        self.trackers.extend(trackers if trackers is not None else [None] * n)
+        return ids
+
+    def remove(self, indexes):
+        """ Remove the objects at ``indexes``
+        """
+        indexes = np.asarray(indexes, dtype=int)
+        if len(indexes) == 0:
+            return
+        self.bboxes = np.delete(self.bboxes, indexes, axis=0)
+        self.life = np.delete(self.life, indexes)
+        self.scores = np.delete(self.scores, indexes)
+        self.type_ids = np.delete(self.type_ids, indexes)
+        self.start_times = np.delete(self.start_times, indexes)
+        self.ids = np.delete(self.ids, indexes)
+        removed = set(indexes.tolist())
+        self.trackers = [t for i, t in enumerate(self.trackers) if i not in removed]
+
+
+def tracking_objects_from_arrays(bboxes, scores, classes, id2name):
+    """ Build detected (untracked) objects from detector arrays
+
+        Args:
+            ``bboxes`` (np.array): ``(N, 4)`` bboxes (xmin, ymin, xmax, ymax)
+            ``scores`` (np.array): ``(N,)`` confidences
+            ``classes`` (np.array): ``(N,)`` object type ids
+            ``id2name`` (dict): dictionary that maps the object id (int) to object name (str)
+
+        Returns:
+            List of :class:`TrackingObject`
+    """
+    return [TrackingObject(bbox_xmin=xmin, bbox_ymin=ymin, bbox_xmax=xmax, bbox_ymax=ymax,
+                           life=-1, tracker=None, obj_id=None,
+                           obj_type_id=class_id, obj_type_name=id2name[class_id], obj_score=score)
+            for (xmin, ymin, xmax, ymax), score, class_id in zip(bboxes.tolist(), scores.tolist(), classes.tolist())]
+
+
+def index_of(known_ids, ids):
+    """ Position of every id of ``ids`` in ``known_ids``, e.g. to carry per track state from a frame to the next
+
+        Args:
+            ``known_ids`` (np.array): ``(M,)`` unique ids
+            ``ids`` (np.array): ``(N,)`` ids to be found
+
+        Returns:
+            ``(N,)`` positions, ``-1`` for the ids that are not in ``known_ids``
+    """
+    known_ids = np.asarray(known_ids).reshape(-1)
+    ids = np.asarray(ids).reshape(-1)
+    if len(known_ids) == 0 or len(ids) == 0:
+        return np.full(len(ids), -1, dtype=int)
+    order = np.argsort(known_ids)
+    pos = order[np.minimum(np.searchsorted(known_ids, ids, sorter=order), len(known_ids) - 1)]
+    return np.where(known_ids[pos] == ids, pos, -1)
+
+
 class BaseObjectEstimator(object):
     """ Base class for object location estimation.            
     """
@@ -2,17 +2,80 @@
 
 import cv2
 import io
+import numpy as np
 import tensorflow as tf
 
+from collections import deque
 from PIL import Image
 from scipy.special import softmax
 
 IMAGE_SIZE = (300, 300)
+RAW_INPUT_KEY = 'frames'
+
+
+class FrameWindow(object):
+
+    """ Rolling window of frames already preprocessed by a :class:`MovementClassifier`
+
+        Frames are preprocessed once, when pushed. With ``raw_input`` the window is a preallocated
+        uint8 ring the frames are resized into in place, otherwise a deque of JPEG strings.
+    """
+
+    def __init__(self, classifier, fill=True):
+        """ Constructor
+
+            Args:
+                ``classifier`` (MovementClassifier): classifier whose preprocessing and window size are used
+                ``fill`` (bool): Whether or not the first frame fills the whole window. Otherwise the window
+                    is only :attr:`full` after ``window_size`` frames
+        """
+        self.classifier = classifier
+        self.size = classifier.window_size
+        self.fill = fill
+        self.count = 0
+        self._idx = 0
+        if classifier.raw_input:
+            self._frames = np.empty((self.size, IMAGE_SIZE[1], IMAGE_SIZE[0], 3), dtype=np.uint8)
+        else:
+            self._frames = deque(maxlen=self.size)
+
+    @property
+    def full(self):
+        return self.count >= self.size
+
+    def push(self, frame):
+        """ Preprocess a frame and slide the window
+        """
+        first = self.count == 0 and self.fill
+        if self.classifier.raw_input:
+            if first:
+                self._frames[:] = self.classifier.preprocess(frame)
+            else:
+                # resize straight into the oldest slot of the ring
+                self.classifier.preprocess(frame, out=self._frames[self._idx])
+                self._idx = (self._idx + 1) % self.size
+        else:
+            processed = self.classifier.preprocess(frame)
+            self._frames.extend([processed] * (self.size if first else 1))
+        self.count = self.size if first else min(self.count + 1, self.size)
+
+    def frames(self):
+        """ Returns the preprocessed frames, oldest first
+        """
+        if self.classifier.raw_input:
+            return np.concatenate([self._frames[self._idx:], self._frames[:self._idx]])
+        return list(self._frames)
 
 
 class MovementClassifier(object):
 
     """ Movement classifier using trained model
+
+        Frames can be given all at once to :meth:`process`, or one by one to :meth:`push`,
+        which keeps a rolling :class:`FrameWindow` of already preprocessed frames (resized, and JPEG
+        encoded unless ``raw_input`` is set), so :meth:`predict` only pays for the newest frame.
+        Several windows, e.g. one per tracked person, are scored with a single model call by
+        :meth:`predict_batch`.
     """
 
     def __init__(self, **kwargs):
@@ -21,29 +84,83 @@ class MovementClassifier(object):
                 ``kwargs`` (dict): Detector arguments. They are:
                 ``model_path`` (str): model path to saved model
                 ``threshold`` (float): Detection threshold
+                ``raw_input`` (bool): Whether or not the model was exported with the raw tensor input
+                    (``get_tensor_serving_fn`` in ``ml/train_net.py``) instead of JPEG strings
+                ``window_size`` (int): Number of frames the model takes
         """
 
         self.model = None
         self.model_path = kwargs.get('model_path', None)
         self.threshold = kwargs.get('threshold', 0.5)
+        self.raw_input = kwargs.get('raw_input', False)
+        self.window_size = kwargs.get('window_size', 16)
         self.objects = None
+        self._window = None
         assert self.model_path is not None, 'Path of detection model must be set'
 
     def initialize(self):
         self.model = tf.contrib.predictor.from_saved_model(self.model_path)
 
     def process(self, frame_buffer=[]):
+        return self._predict_batch([[self.preprocess(f) for f in frame_buffer]])[0]
+
+    def preprocess(self, frame, out=None):
+        """ Resize a frame to the model input size and, unless ``raw_input`` is set, JPEG encode it
+
+            Args:
+                ``frame`` (np.array): frame to be preprocessed
+                ``out`` (np.array): preallocated resize destination, if any
+        """
+        resized = cv2.resize(frame, IMAGE_SIZE, dst=out)
+        if self.raw_input:
+            return resized
+        img = Image.fromarray(resized)
+        img_byte_array = io.BytesIO()
+        img.save(img_byte_array, format='JPEG')
+        return img_byte_array.getvalue()
+
+    def new_window(self, fill=True):
+        """ Returns an empty :class:`FrameWindow` for this classifier
+        """
+        return FrameWindow(self, fill=fill)
+
+    def push(self, frame):
+        """ Preprocess a frame and slide the window. The first frame fills the whole window
+        """
+        if self._window is None:
+            self._window = self.new_window()
+        self._window.push(frame)
+
+    def window(self):
+        """ Returns the preprocessed frames of the window, oldest first
+        """
+        return self._window.frames()
+
+    def predict(self):
+        """ Panic score of the current window, see :meth:`push`
+        """
+        assert self._window is not None, 'No frame was pushed yet'
+        return self.predict_batch([self._window])[0]
+
+    def predict_batch(self, windows):
+        """ Panic scores of several windows, with a single model call
+
+            Args:
+                ``windows`` (list(FrameWindow)): windows to be scored
+
+            Returns:
+                ``(N,)`` array of panic scores
+        """
+        if len(windows) == 0:
+            return np.zeros(0)
+        return self._predict_batch([w.frames() for w in windows])
+
+    def _predict_batch(self, batch):
         if self.model is None:
             self.initialize()
-        frames = {}
-        list(frame_buffer)
-        for idx, f in enumerate(list(frame_buffer)):
-            resized = cv2.resize(f, IMAGE_SIZE)
-            key = 'frame_{}'.format(idx)
-            img = Image.fromarray(resized)
-            img_byte_array = io.BytesIO()
-            img.save(img_byte_array, format='JPEG')
-            frames[key] = [img_byte_array.getvalue()]
-        predict = self.model(frames)
-        panic_score = softmax(predict.get('output'))[0][1] * 100
-        return panic_score
+        if self.raw_input:
+            predict = self.model({RAW_INPUT_KEY: np.stack([np.asarray(frames) for frames in batch])})
+        else:
+            predict = self.model({'frame_{}'.format(idx): [frames[idx] for frames in batch]
+                                  for idx in range(len(batch[0]))})
+        return softmax(predict.get('output'), axis=1)[:, 1] * 100
@@ -3,7 +3,7 @@
 import numpy as np
 import tensorflow as tf
 
-from engine.base_object_estimator import BaseObjectEstimator, TrackingObject
+from engine.base_object_estimator import BaseObjectEstimator, tracking_objects_from_arrays
 
 
 class Detector(BaseObjectEstimator):
@@ -24,63 +24,87 @@ class Detector(BaseObjectEstimator):
         self.model_path = kwargs.get('model_path', None)
         self.id2name = kwargs.get('id2name', None)
         self.threshold = kwargs.get('threshold', 0.5)
-        self.objects = None
+        self.bboxes = np.zeros((0, 4), dtype=int)
+        self.scores = np.zeros(0)
+        self.classes = np.zeros(0, dtype=int)
+        self._objects = None
         assert self.model_path is not None, 'Path of detection model must be set'
         assert self.id2name is not None, 'id2name dict must be set'
+        self._class_ids = np.array(list(self.id2name.keys()), dtype=int)
 
     def initialize(self):
         self.model = tf.contrib.predictor.from_saved_model(self.model_path)
 
+    @property
+    def objects(self):
+        """ Returns the :class:`~engine.base_object_estimator.TrackingObject` list of the last
+            detected frame, built on first access
+        """
+        if self._objects is None:
+            self._objects = tracking_objects_from_arrays(self.bboxes, self.scores, self.classes, self.id2name)
+        return self._objects
+
     def process(self, frame):
+        self.detect(frame)
+        return self.objects
+
+    def detect(self, frame):
+        """ Detect objects without building :class:`~engine.base_object_estimator.TrackingObject` instances
+
+            Args:
+                ``frame`` (np.array): frame to be processed
+
+            Returns:
+                Tuple of bboxes ``(N, 4)`` int array (xmin, ymin, xmax, ymax) in pixels, scores and classes arrays
+        """
+        self.bboxes, self.scores, self.classes = self.detect_batch([frame])[0]
+        self._objects = None
+        return self.bboxes, self.scores, self.classes
+
+    def process_batch(self, frames):
+        """ Detect objects on several frames with a single predictor call
+
+            Args:
+                ``frames`` (list(np.array)): frames to be processed, all of them with the same shape
+
+            Returns:
+                List with the detected :class:`~engine.base_object_estimator.TrackingObject` list of each frame
+        """
+        return [tracking_objects_from_arrays(bboxes, scores, classes, self.id2name)
+                for bboxes, scores, classes in self.detect_batch(frames)]
+
+    def detect_batch(self, frames):
+        """ Detect objects on several frames with a single predictor call, see :meth:`detect`
+
+            Args:
+                ``frames`` (list(np.array)): frames to be processed, all of them with the same shape
+
+            Returns:
+                List with the (bboxes, scores, classes) arrays of each frame
+        """
         if self.model is None:
             self.initialize()
 
-        height, width = frame.shape[:2]
-
-        predict = self.model({'inputs': [frame]})
-        _objects = self._parse_prediction(predict)
-        _objects = self._scale_bbox(_objects, height, width)
-
-        self.objects = [TrackingObject(bbox_xmin=obj['detection_bbox_original'][0],
-                                       bbox_ymin=obj['detection_bbox_original'][1],
-                                       bbox_xmax=obj['detection_bbox_original'][2],
-                                       bbox_ymax=obj['detection_bbox_original'][3],
-                                       life=-1, tracker=None, obj_id=None,
-                                       obj_type_id=obj['detection_class'],
-                                       obj_type_name=self.id2name[obj['detection_class']],
-                                       obj_score=obj['detection_score'])
-                        for obj in _objects]
-        return self.objects
+        height, width = frames[0].shape[:2]
+        assert all(f.shape == frames[0].shape for f in frames), 'Frames of a batch must have the same shape'
+
+        predict = self.model({'inputs': np.stack(frames)})
+        return [self._parse_prediction(predict, height, width, idx) for idx in range(len(frames))]
 
-    def _parse_prediction(self, output_dict):
-        # filter objects by score
-        idx_high = np.where(output_dict['detection_scores'][0] >= self.threshold)[0]
-        idx_object_ids = output_dict['detection_classes'][0][idx_high].astype(int)
-
-        # filter objects by objects of interest
-        idx_filtered_object_ids = np.where(np.isin(idx_object_ids, list(self.id2name.keys())))[0]
-
-        detection_classes = output_dict['detection_classes'][0][idx_filtered_object_ids]
-        detection_scores = output_dict['detection_scores'][0][idx_filtered_object_ids]
-        detection_boxes = output_dict['detection_boxes'][0][idx_filtered_object_ids]
-
-        parsed_pred = [{'detection_class': class_id, 'detection_score': score, 'detection_bbox': bbox}
-                       for class_id, score, bbox in zip(detection_classes, detection_scores, detection_boxes)]
-        return parsed_pred
-
-    @staticmethod
-    def _scale_bbox(parsed_pred, height, width):
-        for obj in parsed_pred:
-            obj['detection_bbox_original'] = [
-                int(width * obj['detection_bbox'][1]),  # x_min
-                int(height * obj['detection_bbox'][0]),  # y_min
-                int(width * obj['detection_bbox'][3]),  # x_max
-                int(height * obj['detection_bbox'][2])  # y_max
-            ]
-
-            obj['centroid'] = [int((obj['detection_bbox_original'][0] + obj['detection_bbox_original'][2]) / 2),
-                               int((obj['detection_bbox_original'][1] + obj['detection_bbox_original'][3]) / 2)]
-        return parsed_pred
+    def _parse_prediction(self, output_dict, height, width, idx=0):
+        """ Filter objects by score and by objects of interest and scale their boxes to pixels
+
+            Returns:
+                Tuple of bboxes ``(N, 4)`` int array (xmin, ymin, xmax, ymax), scores and classes arrays
+        """
+        scores = output_dict['detection_scores'][idx]
+        classes = output_dict['detection_classes'][idx].astype(int)
+        keep = (scores >= self.threshold) & np.isin(classes, self._class_ids)
+
+        # boxes are normalized (ymin, xmin, ymax, xmax)
+        boxes = output_dict['detection_boxes'][idx][keep]
+        bboxes = (boxes[:, [1, 0, 3, 2]] * np.array([width, height, width, height])).astype(int)
+        return bboxes, scores[keep], classes[keep]
 
     def get_objects(self):
         return self.objects
@@ -0,0 +1,292 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import multiprocessing
+import multiprocessing.connection
+import numpy as np
+import queue
+import time
+
+from engine.base_object_estimator import BaseObjectEstimator, tracking_objects_from_arrays
+from engine.classifier import MovementClassifier
+from stream.shared_memory_stream import SharedFrameRing
+
+logging.basicConfig()
+logger = logging.getLogger('Detector-Service')
+logger.setLevel(logging.INFO)
+
+# Seconds between two checks of the service while waiting for detections
+RESULT_POLL_SECS = 1.
+
+# Request kinds
+DETECT = 'detect'
+CLASSIFY = 'classify'
+
+
+class DetectorServiceError(RuntimeError):
+    """ Detection failed in the service, or the service is not running
+    """
+
+
+class DetectorService(object):
+
+    """ Single :class:`~engine.detector.Detector`, and optionally a single
+        :class:`~engine.classifier.MovementClassifier`, shared by several camera processes
+
+        The models are loaded once, in the service process. Each client owns a small
+        :class:`~stream.shared_memory_stream.SharedFrameRing` where it writes the frame to be
+        processed, so detection requests only carry ``(client_idx, seq)`` and frames are never pickled.
+        Detections are sent back to the client as ``(bboxes, scores, classes)`` arrays. Classification
+        requests carry the preprocessed frames of the windows to be scored (JPEG strings unless the
+        classifier takes raw input) and get their panic scores back.
+
+        Errors are sent back to the clients of the failing requests only, and raised by them, see
+        :class:`DetectorServiceError`. Clients stop waiting once :attr:`failed` is set, by the service
+        when a model cannot be loaded or by :meth:`watch` when the service process dies.
+
+        Requests are micro-batched: after the first request arrives, the service waits up to
+        ``max_batch_wait_ms`` for more of them (at most ``max_batch_size``) and runs a single
+        :meth:`~engine.detector.Detector.detect_batch` call for all the detection requests, and a single
+        classifier call for all the classification requests. When a batch fails, its requests are
+        retried one by one, so one bad input does not fail the others.
+    """
+
+    def __init__(self, n_clients, frame_shape, max_batch_size=None, max_batch_wait_ms=10, classifier_kwargs=None,
+                 **kwargs):
+        """ Constructor
+
+            Args:
+                ``n_clients`` (int): Number of clients (cameras) served
+                ``frame_shape`` (tuple): Shape (height, width, channels) of the frames sent by clients
+                ``max_batch_size`` (int): Max number of frames per predictor call. Defaults to ``n_clients``
+                ``max_batch_wait_ms`` (float): Max time to wait for a batch to be filled
+                ``classifier_kwargs`` (dict): :class:`~engine.classifier.MovementClassifier` arguments, if the
+                    movement classifier is shared too
+                ``kwargs`` (dict): :class:`~engine.detector.Detector` arguments
+        """
+        assert n_clients > 0, 'Detector service must have at least one client'
+
+        self.max_batch_size = max_batch_size or n_clients
+        self.max_batch_wait_ms = max_batch_wait_ms
+        self.detector_kwargs = kwargs
+        self.classifier_kwargs = classifier_kwargs
+        self.id2name = kwargs.get('id2name', None)
+        self.rings = [SharedFrameRing(frame_shape, slots=2) for _ in range(n_clients)]
+        self.requests = multiprocessing.Queue()
+        self.results = [multiprocessing.Queue() for _ in range(n_clients)]
+        self.failed = multiprocessing.Event()
+        self._process = None
+
+        assert self.id2name is not None, 'id2name dict must be set'
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_process'] = None
+        return state
+
+    def start(self):
+        """ Start the service process
+        """
+        self._process = multiprocessing.Process(target=self._serve, name='Detector-Service')
+        self._process.daemon = True
+        self._process.start()
+
+    def stop(self):
+        """ Ask the service process to finish and wait for it
+        """
+        self.requests.put(None)
+        if self._process is not None:
+            self._process.join()
+            self._process = None
+
+    def watch(self, processes):
+        """ Wait for ``processes`` (the clients) to finish, setting :attr:`failed` if the service process
+            dies before them
+        """
+        pending = dict((process.sentinel, process) for process in processes)
+        while pending:
+            sentinels = list(pending)
+            if not self.failed.is_set():
+                sentinels.append(self._process.sentinel)
+            for sentinel in multiprocessing.connection.wait(sentinels):
+                if sentinel in pending:
+                    pending.pop(sentinel).join()
+                else:
+                    logger.error('Detector service died (exit code {})'.format(self._process.exitcode))
+                    self.failed.set()
+
+    def client(self, client_idx):
+        """ Returns the object estimator to be used by client ``client_idx``
+        """
+        return RemoteDetector(self, client_idx)
+
+    def classifier(self, client_idx):
+        """ Returns the movement classifier to be used by client ``client_idx``
+        """
+        assert self.classifier_kwargs is not None, 'The movement classifier is not shared by this service'
+        return RemoteClassifier(self, client_idx)
+
+    def request(self, client_idx, kind, payload):
+        """ Send a request on behalf of client ``client_idx`` and wait for its result. A client has at
+            most one request in flight
+
+            Raises:
+                :class:`DetectorServiceError` if the request failed or the service is not running
+        """
+        self.requests.put((kind, client_idx, payload))
+        while True:
+            try:
+                result = self.results[client_idx].get(timeout=RESULT_POLL_SECS)
+                break
+            except queue.Empty:
+                if self.failed.is_set():
+                    raise DetectorServiceError('Detector service is not running')
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _next_batch(self):
+        """ Block for a request and collect the ones arriving within the batch window
+
+            Returns:
+                List of ``(kind, client_idx, payload)`` requests and whether the service must stop
+        """
+        request = self.requests.get()
+        if request is None:
+            return [], True
+        batch = [request]
+        deadline = time.time() + self.max_batch_wait_ms / 1000.
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.time()
+            if timeout <= 0:
+                break
+            try:
+                request = self.requests.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if request is None:
+                return batch, True
+            batch.append(request)
+        return batch, False
+
+    def _serve(self):
+        """ Service loop: load the model and answer detection requests until ``None`` is received
+        """
+        from engine.detector import Detector
+
+        try:
+            detector = Detector(**self.detector_kwargs)
+            detector.initialize()
+            classifier = None
+            if self.classifier_kwargs is not None:
+                classifier = MovementClassifier(**self.classifier_kwargs)
+                classifier.initialize()
+        except Exception:
+            self.failed.set()
+            raise
+
+        def detect(requests):
+            return detector.detect_batch([self.rings[client_idx].frame(self.rings[client_idx].slot_of(seq))
+                                          for _, client_idx, seq in requests])
+
+        def classify(requests):
+            # every request holds the windows of a client, all of them are scored at once
+            scores = classifier._predict_batch([frames for _, _, windows in requests for frames in windows])
+            offsets = np.cumsum([0] + [len(windows) for _, _, windows in requests])
+            return [scores[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+        logger.info('Serving {} clients'.format(len(self.rings)))
+        stop = False
+        while not stop:
+            batch, stop = self._next_batch()
+            self._answer([request for request in batch if request[0] == DETECT], detect)
+            self._answer([request for request in batch if request[0] == CLASSIFY], classify)
+
+    def _answer(self, requests, run):
+        """ Run ``requests`` as a single batch and send every client its result. If the batch fails, its
+            requests are retried one by one, so that only the failing ones get an error
+        """
+        if not requests:
+            return
+        try:
+            results = run(requests)
+        except Exception as e:
+            if len(requests) == 1:
+                logger.exception('{} request of client {} failed'.format(requests[0][0], requests[0][1]))
+                # the original exception may not be picklable
+                results = [DetectorServiceError('{} failed: {!r}'.format(requests[0][0].capitalize(), e))]
+            else:
+                results = None
+        if results is None:
+            for request in requests:
+                self._answer([request], run)
+            return
+        for (_, client_idx, _), result in zip(requests, results):
+            self.results[client_idx].put(result)
+
+
+class RemoteDetector(BaseObjectEstimator):
+
+    """ Object estimator that delegates detection to a :class:`DetectorService`
+    """
+
+    def __init__(self, service, client_idx):
+        """ Constructor
+
+            Args:
+                ``service`` (:class:`DetectorService`): detector service
+                ``client_idx`` (int): index of this client on the service
+        """
+        super(RemoteDetector, self).__init__()
+        self.service = service
+        self.client_idx = client_idx
+        self.objects = None
+
+    def initialize(self):
+        """ Initialization. There is nothing to be done here, the model lives in the service
+        """
+        pass
+
+    def process(self, frame):
+        bboxes, scores, classes = self.detect(frame)
+        self.objects = tracking_objects_from_arrays(bboxes, scores, classes, self.service.id2name)
+        return self.objects
+
+    def detect(self, frame):
+        """ Returns the (bboxes, scores, classes) arrays computed by the service, see
+            :meth:`~engine.detector.Detector.detect`
+
+            Raises:
+                :class:`DetectorServiceError` if detection failed or the service is not running
+        """
+        seq = self.service.rings[self.client_idx].write(frame)
+        return self.service.request(self.client_idx, DETECT, seq)
+
+    def get_objects(self):
+        return self.objects
+
+
+class RemoteClassifier(MovementClassifier):
+
+    """ Movement classifier that delegates scoring to a :class:`DetectorService`. Frames are still
+        preprocessed into the windows by the client, only the model lives in the service
+    """
+
+    def __init__(self, service, client_idx):
+        """ Constructor
+
+            Args:
+                ``service`` (:class:`DetectorService`): detector service sharing the classifier
+                ``client_idx`` (int): index of this client on the service
+        """
+        super(RemoteClassifier, self).__init__(**service.classifier_kwargs)
+        self.service = service
+        self.client_idx = client_idx
+
+    def initialize(self):
+        """ Initialization. There is nothing to be done here, the model lives in the service
+        """
+        pass
+
+    def _predict_batch(self, batch):
+        return self.service.request(self.client_idx, CLASSIFY, batch)
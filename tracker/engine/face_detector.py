@@ -2,44 +2,208 @@
 
 import config
 import cv2
+import numpy as np
 import time
 
+from engine.base_object_estimator import index_of
+
 
 class FaceDetector(object):
 
     """ Haar cascade frontal face detector
+
+        By default the cascade runs on the whole frame. With ``roi`` set, it only runs inside the
+        padded bounding boxes of the tracked people, downscaled by ``scale``, looking for faces whose
+        size is a fraction of the person box height. Detection is then skipped while the people
+        barely move, up to ``max_skip`` frames, and the faces of the last detection are reused.
+
+        Faces are assigned to the tracked people they fall into, and an :class:`UnderwaterTimers`
+        keeps how long the face of every one of them has been in the water, i.e. continuously visible.
     """
 
-    def __init__(self):
+    def __init__(self, **kwargs):
+        """
+            Args:
+                ``kwargs`` (dict): Face detector arguments. They are:
+                ``roi`` (bool): Whether or not to restrict detection to the person bboxes
+                ``padding`` (float): Padding added to every side of a person bbox, relative to its size
+                ``scale`` (float): Downscale applied to the person crops
+                ``min_face`` (float): Min face size, relative to the person bbox height
+                ``max_face`` (float): Max face size, relative to the person bbox height
+                ``scale_factor`` (float): Cascade scale factor
+                ``min_neighbors`` (int): Cascade min neighbors
+                ``max_skip`` (int): Max number of frames between two detections
+                ``motion_threshold`` (float): Displacement of a person since the last detection, relative
+                    to its height, above which detection is not skipped
+                ``tolerance_frames`` (int): Number of consecutive frames a face can be missed before
+                    its timer is reset
+        """
         self.face_cascade = cv2.CascadeClassifier(config.CASCADE_CLASSIFIER_PATH)
+        self.roi = kwargs.get('roi', False)
+        self.padding = kwargs.get('padding', 0.2)
+        self.scale = kwargs.get('scale', 0.5)
+        self.min_face = kwargs.get('min_face', 0.08)
+        self.max_face = kwargs.get('max_face', 0.5)
+        self.scale_factor = kwargs.get('scale_factor', 1.3)
+        self.min_neighbors = kwargs.get('min_neighbors', 5)
+        self.max_skip = kwargs.get('max_skip', 0)
+        self.motion_threshold = kwargs.get('motion_threshold', 0.05)
+
+        self.faces = []
+        self._last_bboxes = None
+        self._skipped = 0
+        self.timers = UnderwaterTimers(tolerance_frames=kwargs.get('tolerance_frames', 10))
+
+    def process(self, frame, bboxes=None, track_ids=None, timestamp=None):
+        """ Detect faces, draw them and update the underwater timers
+
+            Args:
+                ``frame`` (numpy array): image
+                ``bboxes`` (list(tuple)): bboxes (xmin, ymin, xmax, ymax) of the tracked people
+                ``track_ids`` (list(int)): track ids of ``bboxes``
+                ``timestamp`` (float): capture timestamp of the frame, in seconds. Wall-clock time if ``None``
+
+            Returns:
+                Tuple of the frame and the ``(N,)`` array of seconds the face of every tracked person
+                has been in the water
+        """
+        if self.roi and bboxes is not None:
+            if not self._can_skip(bboxes):
+                self.faces = self._detect_in_bboxes(frame, bboxes)
+                self._last_bboxes = np.array(bboxes, dtype=float).reshape(-1, 4)
+                self._skipped = 0
+            else:
+                self._skipped += 1
+        else:
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            self.faces = self.face_cascade.detectMultiScale(gray, self.scale_factor, self.min_neighbors)
+        faces = self.faces
+
+        if track_ids is None:
+            track_ids = range(len(bboxes)) if bboxes is not None else []
+        if timestamp is None:
+            timestamp = time.time()
+        seconds = self.timers.update(track_ids, bboxes, faces, timestamp)
 
-        self.start_flag=False
-        self.start = 0
-        self.tolerance_frames = 10
-        self.tolerance_counter = 0
-        self.duration = 0
-
-    def process(self, frame):
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        
-        faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
-        
-        if len(faces) > 0 and not self.start_flag:
-            self.start_flag=True
-            self.start = time.time()
-            self.duration = 0 
-            self.tolerance_counter=0
-        elif len(faces) > 0 and self.start_flag:
-            self.duration = time.time() - self.start
-        elif len(faces) == 0 and self.tolerance_counter < self.tolerance_frames:
-            self.tolerance_counter+=1
-            # self.duration = time.time() - self.start
-        elif len(faces) == 0 and self.tolerance_counter >= self.tolerance_frames:
-            self.start_flag=False
-            self.start = time.time()
-            self.duration = 0 
-            self.tolerance_counter=0
-        
         for (x, y, w, h) in faces:
             cv2.rectangle(frame, (x, y), (x + w, y + h), (255, 0, 0), 2)
-        return frame, self.duration
+        return frame, seconds
+
+    def _can_skip(self, bboxes):
+        """ Whether or not the faces of the last detection are still good for ``bboxes``
+        """
+        if self._last_bboxes is None or self._skipped >= self.max_skip:
+            return False
+        bboxes = np.array(bboxes, dtype=float).reshape(-1, 4)
+        if len(bboxes) != len(self._last_bboxes):
+            return False
+        if len(bboxes) == 0:
+            return True
+        height = np.maximum(bboxes[:, 3] - bboxes[:, 1], 1.)
+        displacement = np.abs(bboxes - self._last_bboxes).max(axis=1)
+        return bool(np.all(displacement / height < self.motion_threshold))
+
+    def _detect_in_bboxes(self, frame, bboxes):
+        """ Run the cascade on the downscaled, padded crop of every person bbox
+
+            Returns:
+                List of faces (x, y, w, h) in frame coordinates
+        """
+        height, width = frame.shape[:2]
+        faces = []
+        for bbox in bboxes:
+            xmin, ymin, xmax, ymax = bbox[0], bbox[1], bbox[2], bbox[3]
+            pad_x, pad_y = int((xmax - xmin) * self.padding), int((ymax - ymin) * self.padding)
+            xmin, ymin = max(int(xmin) - pad_x, 0), max(int(ymin) - pad_y, 0)
+            xmax, ymax = min(int(xmax) + pad_x, width), min(int(ymax) + pad_y, height)
+            if xmax <= xmin or ymax <= ymin:
+                continue
+
+            crop = cv2.cvtColor(frame[ymin:ymax, xmin:xmax], cv2.COLOR_BGR2GRAY)
+            if self.scale != 1:
+                crop = cv2.resize(crop, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+            box_height = (bbox[3] - bbox[1]) * self.scale
+            min_size = max(int(box_height * self.min_face), 1)
+            max_size = max(int(box_height * self.max_face), min_size)
+            if min(crop.shape[:2]) < min_size:
+                continue
+
+            detected = self.face_cascade.detectMultiScale(crop, self.scale_factor, self.min_neighbors,
+                                                          minSize=(min_size, min_size),
+                                                          maxSize=(max_size, max_size))
+            for (x, y, w, h) in detected:
+                faces.append((xmin + int(x / self.scale), ymin + int(y / self.scale),
+                              int(w / self.scale), int(h / self.scale)))
+        return faces
+
+
+class UnderwaterTimers(object):
+
+    """ Time the face of every tracked person has been in the water, i.e. continuously visible
+
+        A timer starts when a face of the track shows up and keeps running while it stays visible.
+        It survives up to ``tolerance_frames`` consecutive frames without face (e.g. missed by the
+        detector), during which it holds its value, and is reset beyond that. Tracks never seen
+        with a face stay at 0.
+
+        State is kept per track id in flat arrays (ids, timestamp the face showed up, ``nan`` when
+        there is none, seconds reported and number of consecutive frames without face), so every track
+        is updated in a single vectorized pass. Timings come from the frame timestamps, hence replaying
+        a video faster than real time gives the same results.
+    """
+
+    def __init__(self, tolerance_frames=10):
+        """ Constructor
+
+            Args:
+                ``tolerance_frames`` (int): Number of consecutive frames a face can be missed before
+                    its timer is reset
+        """
+        self.tolerance_frames = tolerance_frames
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.started = np.zeros(0)
+        self.seconds = np.zeros(0)
+        self.missed = np.zeros(0, dtype=np.int32)
+
+    def update(self, track_ids, bboxes, faces, timestamp):
+        """ Update the timers with the faces found in a frame. Tracks that are gone are forgotten
+
+            Args:
+                ``track_ids`` (list(int)): ids of the current tracks
+                ``bboxes`` (list(tuple)): bboxes (xmin, ymin, xmax, ymax) of the current tracks
+                ``faces`` (list(tuple)): faces (x, y, w, h) found in the frame
+                ``timestamp`` (float): frame timestamp, in seconds
+
+            Returns:
+                ``(N,)`` array of seconds in the water, aligned with ``track_ids``
+        """
+        ids = np.asarray(track_ids, dtype=np.int64).reshape(-1)
+        started = np.full(len(ids), np.nan)
+        seconds = np.zeros(len(ids))
+        missed = np.zeros(len(ids), dtype=np.int32)
+
+        # carry the state of the known tracks
+        pos = index_of(self.ids, ids)
+        known = pos >= 0
+        started[known] = self.started[pos[known]]
+        seconds[known] = self.seconds[pos[known]]
+        missed[known] = self.missed[pos[known]]
+
+        # a face belongs to every track whose bbox contains its center
+        visible = np.zeros(len(ids), dtype=bool)
+        if len(ids) > 0 and len(faces) > 0:
+            boxes = np.asarray(bboxes, dtype=float).reshape(-1, 4)[:, None, :]
+            faces = np.asarray(faces, dtype=float).reshape(-1, 4)
+            centers = (faces[:, :2] + faces[:, 2:] / 2)[None, :, :]
+            visible = ((centers >= boxes[..., :2]) & (centers <= boxes[..., 2:])).all(axis=2).any(axis=1)
+
+        starting = visible & np.isnan(started)
+        started[starting] = timestamp
+        seconds[visible] = timestamp - started[visible]
+        missed[visible] = 0
+        missed[~visible] += 1
+        lost = missed > self.tolerance_frames
+        started[lost], seconds[lost], missed[lost] = np.nan, 0., 0
+
+        self.ids, self.started, self.seconds, self.missed = ids, started, seconds, missed
+        return seconds.copy()
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+_DIM_X = 8  # cx, cy, w, h and their velocities
+_DIM_Z = 4  # cx, cy, w, h
+
+
+def _to_measurement(bboxes):
+    """ (xmin, ymin, xmax, ymax) -> (cx, cy, w, h)
+    """
+    bboxes = np.asarray(bboxes, dtype=float).reshape(-1, 4)
+    wh = bboxes[:, 2:] - bboxes[:, :2]
+    return np.hstack([bboxes[:, :2] + wh / 2, wh])
+
+
+class KalmanBoxFilter(object):
+
+    """ Constant velocity Kalman filter over the bounding boxes of all tracked objects at once
+
+        State of every object is ``(cx, cy, w, h, vcx, vcy, vw, vh)``, held as rows of a single
+        ``(N, 8)`` array with ``(N, 8, 8)`` covariances, so predicting every object is a couple of
+        matrix products regardless of the number of objects or the frame resolution.
+        Rows follow the order in which objects were added, see :meth:`add` and :meth:`remove`.
+    """
+
+    def __init__(self, position_noise=1. / 20, velocity_noise=1. / 160, measurement_noise=1. / 20):
+        """ Constructor
+
+            Args:
+                ``position_noise`` (float): process noise std of position and size, relative to the box size
+                ``velocity_noise`` (float): process noise std of velocities, relative to the box size
+                ``measurement_noise`` (float): measurement noise std, relative to the box size
+        """
+        self.position_noise = position_noise
+        self.velocity_noise = velocity_noise
+        self.measurement_noise = measurement_noise
+
+        self.F = np.eye(_DIM_X)
+        self.F[:_DIM_Z, _DIM_Z:] = np.eye(_DIM_Z)
+        self.H = np.eye(_DIM_Z, _DIM_X)
+
+        self.x = np.zeros((0, _DIM_X))
+        self.P = np.zeros((0, _DIM_X, _DIM_X))
+
+    def __len__(self):
+        return len(self.x)
+
+    @property
+    def bboxes(self):
+        """ Returns the ``(N, 4)`` int bboxes (xmin, ymin, xmax, ymax) of the current state
+        """
+        center, wh = self.x[:, :2], np.maximum(self.x[:, 2:4], 1.)
+        return np.hstack([center - wh / 2, center + wh / 2]).astype(int)
+
+    @staticmethod
+    def _side(wh):
+        """ Per object noise scale, given by the box mean side
+        """
+        return np.maximum(wh.mean(axis=1), 1.)
+
+    def add(self, bboxes):
+        """ Start filtering new objects, with zero velocity
+
+            Args:
+                ``bboxes`` (np.array): ``(K, 4)`` bboxes (xmin, ymin, xmax, ymax)
+        """
+        z = _to_measurement(bboxes)
+        x = np.hstack([z, np.zeros_like(z)])
+        side = self._side(z[:, 2:])
+        P = np.zeros((len(z), _DIM_X, _DIM_X))
+        P[:, range(_DIM_Z), range(_DIM_Z)] = ((2 * self.position_noise * side) ** 2)[:, None]
+        # velocities are unknown
+        P[:, range(_DIM_Z, _DIM_X), range(_DIM_Z, _DIM_X)] = ((10 * self.velocity_noise * side) ** 2)[:, None]
+        self.x = np.vstack([self.x, x])
+        self.P = np.concatenate([self.P, P])
+
+    def remove(self, indexes):
+        """ Stop filtering the objects at ``indexes``
+        """
+        self.x = np.delete(self.x, indexes, axis=0)
+        self.P = np.delete(self.P, indexes, axis=0)
+
+    def predict(self):
+        """ Advance every object one frame
+
+            Returns:
+                Predicted ``(N, 4)`` bboxes
+        """
+        if len(self.x) == 0:
+            return self.bboxes
+        side = self._side(self.x[:, 2:4])
+        Q = np.zeros((len(self.x), _DIM_X, _DIM_X))
+        Q[:, range(_DIM_Z), range(_DIM_Z)] = ((self.position_noise * side) ** 2)[:, None]
+        Q[:, range(_DIM_Z, _DIM_X), range(_DIM_Z, _DIM_X)] = ((self.velocity_noise * side) ** 2)[:, None]
+
+        self.x = self.x.dot(self.F.T)
+        self.P = np.matmul(np.matmul(self.F, self.P), self.F.T) + Q
+        # do not let boxes collapse
+        self.x[:, 2:4] = np.maximum(self.x[:, 2:4], 1.)
+        return self.bboxes
+
+    def update(self, indexes, bboxes):
+        """ Correct the objects at ``indexes`` with their detected bboxes
+
+            Args:
+                ``indexes`` (np.array): ``(K,)`` object indexes
+                ``bboxes`` (np.array): ``(K, 4)`` detected bboxes (xmin, ymin, xmax, ymax)
+        """
+        indexes = np.asarray(indexes, dtype=int)
+        if len(indexes) == 0:
+            return
+        z = _to_measurement(bboxes)
+        x, P = self.x[indexes], self.P[indexes]
+
+        R = np.eye(_DIM_Z)[None] * ((self.measurement_noise * self._side(z[:, 2:])) ** 2)[:, None, None]
+        PHt = np.matmul(P, self.H.T)
+        S = np.matmul(self.H, PHt) + R
+        K = np.matmul(PHt, np.linalg.inv(S))
+        y = z - x.dot(self.H.T)
+
+        self.x[indexes] = x + np.matmul(K, y[:, :, None])[:, :, 0]
+        self.P[indexes] = np.matmul(np.eye(_DIM_X) - np.matmul(K, self.H), P)
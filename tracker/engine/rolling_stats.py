@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from engine.base_object_estimator import index_of
+
+
+class RollingStats(object):
+
+    """ Mean and standard deviation of the last ``window`` values of every track
+
+        Every track keeps its last values in a ring plus their running mean and sum of squared
+        deviations, updated with Welford's method: adding a value, and dropping the oldest one once the
+        window is full, are O(1) per track, and all tracks are updated at once. Tracks that are gone
+        are forgotten.
+    """
+
+    def __init__(self, window=10):
+        """ Constructor
+
+            Args:
+                ``window`` (int): Number of values the statistics are computed on
+        """
+        assert window > 0, 'Window must be positive'
+
+        self.window = window
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.values = np.zeros((0, window))
+        self.pushed = np.zeros(0, dtype=int)
+        self.mean = np.zeros(0)
+        self.m2 = np.zeros(0)
+
+    @property
+    def std(self):
+        """ Returns the ``(N,)`` population standard deviations, aligned with :attr:`ids`
+        """
+        count = np.clip(self.pushed, 1, self.window)
+        return np.sqrt(np.maximum(self.m2, 0.) / count)
+
+    def update(self, track_ids, values):
+        """ Push a new value for every track
+
+            Args:
+                ``track_ids`` (list(int)): ids of the current tracks
+                ``values`` (np.array): ``(N,)`` new values, aligned with ``track_ids``
+
+            Returns:
+                ``(N,)`` standard deviations, aligned with ``track_ids``
+        """
+        ids = np.asarray(track_ids, dtype=np.int64).reshape(-1)
+        x = np.asarray(values, dtype=float).reshape(-1)
+        n = len(ids)
+
+        # carry the state of the known tracks
+        pos = index_of(self.ids, ids)
+        known = pos >= 0
+        ring = np.zeros((n, self.window))
+        pushed = np.zeros(n, dtype=int)
+        mean = np.zeros(n)
+        m2 = np.zeros(n)
+        ring[known] = self.values[pos[known]]
+        pushed[known] = self.pushed[pos[known]]
+        mean[known] = self.mean[pos[known]]
+        m2[known] = self.m2[pos[known]]
+
+        slot = pushed % self.window
+        rows = np.arange(n)
+        full = pushed >= self.window
+        old = ring[rows, slot]
+
+        # growing window: regular Welford step
+        grow_mean = mean + (x - mean) / (pushed + 1)
+        grow_m2 = m2 + (x - mean) * (x - grow_mean)
+        # full window: the oldest value is replaced by the new one
+        slide_mean = mean + (x - old) / self.window
+        slide_m2 = m2 + (x - old) * (x - slide_mean + old - mean)
+
+        ring[rows, slot] = x
+        self.ids = ids
+        self.values = ring
+        self.pushed = pushed + 1
+        self.mean = np.where(full, slide_mean, grow_mean)
+        self.m2 = np.where(full, slide_m2, grow_m2)
+        return self.std
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+import math
+
+
+class AdaptiveDetectionScheduler(object):
+
+    """ Chooses how many frames to track before the next detection step
+
+        The interval moves between ``min_rate`` (urgent) and ``calm_rate`` according to an
+        urgency score, given by tracking failures, objects inside the risk zone and scene motion.
+        An empty scene is detected every ``max_rate`` frames only.
+
+        The interval is never shorter than the one that keeps the average per-frame cost,
+        ``(detection + (interval - 1) * tracking) / interval``, within ``latency_budget_ms``.
+        Detection and tracking costs are measured with an exponential moving average.
+    """
+
+    def __init__(self, min_rate=2, calm_rate=10, max_rate=30, latency_budget_ms=None, motion_threshold=0.05,
+                 smoothing=0.2):
+        """ Constructor
+
+            Args:
+                ``min_rate`` (int): Interval used when urgency is maximum
+                ``calm_rate`` (int): Interval used when there are objects but nothing happens
+                ``max_rate`` (int): Interval used when there are no objects
+                ``latency_budget_ms`` (float): Target average per-frame latency. No constraint if ``None``
+                ``motion_threshold`` (float): Mean displacement per frame, relative to the box height,
+                    above which motion is maximally urgent
+                ``smoothing`` (float): Weight of the newest sample on the latency moving averages
+        """
+        assert 1 < min_rate <= calm_rate <= max_rate, 'Rates must satisfy 1 < min_rate <= calm_rate <= max_rate'
+
+        self.min_rate = min_rate
+        self.calm_rate = calm_rate
+        self.max_rate = max_rate
+        self.latency_budget_ms = latency_budget_ms
+        self.motion_threshold = motion_threshold
+        self.smoothing = smoothing
+        self.detection_ms = None
+        self.tracking_ms = None
+        self.urgency = 0.
+
+    def record(self, elapsed_ms, detection):
+        """ Record the time spent on a detection (or tracking) step
+        """
+        if detection:
+            self.detection_ms = self._smooth(self.detection_ms, elapsed_ms)
+        else:
+            self.tracking_ms = self._smooth(self.tracking_ms, elapsed_ms)
+
+    def _smooth(self, current, sample):
+        if current is None:
+            return sample
+        return (1 - self.smoothing) * current + self.smoothing * sample
+
+    def budget_rate(self):
+        """ Returns the shortest interval that fits the latency budget
+        """
+        if self.latency_budget_ms is None or self.detection_ms is None:
+            return self.min_rate
+        tracking_ms = self.tracking_ms or 0.
+        if tracking_ms >= self.latency_budget_ms:
+            return self.max_rate
+        if self.detection_ms <= self.latency_budget_ms:
+            return self.min_rate
+        rate = int(math.ceil((self.detection_ms - tracking_ms) / (self.latency_budget_ms - tracking_ms)))
+        return min(max(rate, self.min_rate), self.max_rate)
+
+    def next_rate(self, n_objects, n_failures=0, n_at_risk=0, motion=0.):
+        """ Returns the number of frames until the next detection
+
+            Args:
+                ``n_objects`` (int): Number of tracked objects
+                ``n_failures`` (int): Number of objects the tracker lost on the last frame
+                ``n_at_risk`` (int): Number of objects inside the risk zone
+                ``motion`` (float): Mean displacement per frame of the objects, relative to their height
+        """
+        if n_objects == 0:
+            self.urgency = 0.
+            rate = self.max_rate
+        else:
+            # a lost object or someone inside the risk zone is as urgent as it gets
+            if n_failures > 0 or n_at_risk > 0:
+                self.urgency = 1.
+            else:
+                self.urgency = min(motion / self.motion_threshold, 1.)
+            rate = int(round(self.calm_rate - self.urgency * (self.calm_rate - self.min_rate)))
+        return max(rate, self.budget_rate())
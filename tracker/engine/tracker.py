@@ -3,10 +3,13 @@
 import cv2
 import logging
 import numpy as np
+import time
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from engine.base_object_estimator import BaseObjectEstimator, TrackingObject
-from scipy.spatial.distance import euclidean
+from engine.association import associate
+from engine.base_object_estimator import BaseObjectEstimator, TrackTable
+from engine.kalman import KalmanBoxFilter
 
 logging.basicConfig()
 logger = logging.getLogger('Object-Detector')
@@ -26,6 +29,10 @@ class OpenCVTracker(BaseObjectEstimator):
         Once detection is computationally expensive, it is not performed on every frame,
         and thus a tracking algorithm (cheaper) is used.
 
+        With ``tracker_name='kalman'`` no OpenCV tracker is used: every object is predicted by a
+        constant velocity :class:`~engine.kalman.KalmanBoxFilter`, shared by all of them, and
+        corrected on detection frames (SORT-like).
+
     """
 
     def __init__(self, **kwargs):
@@ -35,14 +42,30 @@ class OpenCVTracker(BaseObjectEstimator):
                 ``detector`` (object): An object detector derived from :class:`~engine.base_object_estimator.BaseObjectEstimator`
                 ``detection_rate`` (int): How many frames to perform tracking before the detection step
                 ``object_life_cycle`` (int): How many cycles (Detect & Track) to keep track of an object, even if detection fail.
+                ``tracker_name`` (str): OpenCV tracking algorithm, see ``tracker_list``, or ``kalman``
+                ``min_iou`` (float): IoU above which a detection may always be paired with a tracked object
+                ``n_threads`` (int): Number of threads used to update the OpenCV trackers. Sequential if lower than 2
+                ``scheduler`` (:class:`~engine.scheduler.AdaptiveDetectionScheduler`): Adapts the detection rate, if set
+                ``risk_zone`` (callable): Maps ``(N, 2)`` centroids to a bool array telling which ones are at risk
+                ``rgb`` (bool): Whether or not frames are already RGB (otherwise BGR)
         """
 
-        self.objects = list()
+        self.tracks = TrackTable()
         self.object_life_cycle = kwargs.get('object_life_cycle', 5)
         self.detector = kwargs.get('detector', None)
         self.detection_rate = kwargs.get('detection_rate', 10)
         self.tracker_name = kwargs.get('tracker_name', 'csrt')
+        self.min_iou = kwargs.get('min_iou', 0.3)
         self.frame_idx = 0
+        self.motion_model = KalmanBoxFilter() if self.tracker_name == 'kalman' else None
+        self.n_threads = kwargs.get('n_threads', 0)
+        self.executor = ThreadPoolExecutor(max_workers=self.n_threads) if self.n_threads > 1 else None
+        self.scheduler = kwargs.get('scheduler', None)
+        self.risk_zone = kwargs.get('risk_zone', None)
+        self.rgb = kwargs.get('rgb', False)
+        self.detection_interval = self.detection_rate
+        self.n_failures = 0
+        self.motion = 0.
 
         self.tracker_list = {
             "csrt": cv2.TrackerCSRT_create,
@@ -58,12 +81,20 @@ class OpenCVTracker(BaseObjectEstimator):
         assert issubclass(type(self.detector), BaseObjectEstimator), 'Object detector must inherit BaseObjectEstimator'
         assert self.detection_rate > 1, 'Detection rate must be greater than 1'
         assert self.object_life_cycle > 0, 'Life of object must be positive'
+        assert self.motion_model is not None or self.tracker_name in self.tracker_list, \
+            'Unknown tracker {}'.format(self.tracker_name)
 
     def initialize(self):
         """ Initialization. There is nothing to be done here
         """
         pass
 
+    @property
+    def objects(self):
+        """ Returns :class:`~engine.base_object_estimator.TrackedObject` views of the current objects
+        """
+        return list(self.tracks)
+
     def process(self, frame):
         """ Process frame throught the Detect & Track cycle
 
@@ -73,100 +104,161 @@ class OpenCVTracker(BaseObjectEstimator):
         """
 
         dead_objects = []
-        if (self.frame_idx % self.detection_rate) == 0:  # Detect objects
+        start = time.time()
+        detect = self.frame_idx == 0 or self.frame_idx >= self.detection_interval
+        if detect:  # Detect objects
             self.frame_idx = 1
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            detected_objects = self.detector.process(frame_rgb)
-            logger.info('Objects detected: {}'.format(len(detected_objects)))
+            frame_rgb = frame if self.rgb else cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            bboxes, scores, classes = self._detect(frame_rgb)
+            logger.info('Objects detected: {}'.format(len(bboxes)))
 
             # pairing of detector and tracker centroids, update coordinates and add new objects
-            dead_objects = self._update_from_bbox(frame, [obj.bbox for obj in detected_objects])
+            dead_objects = self._update_from_bbox(frame, bboxes, scores, classes)
+            self.n_failures = 0
 
         else:
-            logger.info('Tracking {} objects'.format(len(self.objects)))
+            logger.info('Tracking {} objects'.format(len(self.tracks)))
             self.frame_idx += 1
+            previous_bboxes = self.tracks.bboxes.copy()
             self._update_from_tracker(frame)
+            if self.scheduler is not None:
+                self.motion = self._measure_motion(previous_bboxes)
+
+        if self.scheduler is not None:
+            self.scheduler.record((time.time() - start) * 1000, detect)
+            self.detection_interval = self.scheduler.next_rate(len(self.tracks), self.n_failures,
+                                                               self._count_at_risk(), self.motion)
 
         return self.get_objects(), dead_objects
 
-    def _update_from_bbox(self, frame, bboxes):
+    def _detect(self, frame):
+        """ Run the detector and return its (bboxes, scores, classes) arrays.
+            Detectors without the array API (``detect``) have their objects converted.
+        """
+        if hasattr(self.detector, 'detect'):
+            return self.detector.detect(frame)
+        detected_objects = self.detector.process(frame)
+        bboxes = np.array([obj.bbox for obj in detected_objects], dtype=int).reshape(-1, 4)
+        scores = np.array([obj.obj_score or 0. for obj in detected_objects], dtype=float)
+        classes = np.array([-1 if obj.obj_type_id is None else obj.obj_type_id for obj in detected_objects], dtype=int)
+        return bboxes, scores, classes
+
+    def _measure_motion(self, previous_bboxes):
+        """ Mean centroid displacement of the objects relative to their height
+        """
+        if len(previous_bboxes) == 0:
+            return 0.
+        bboxes = self.tracks.bboxes
+        displacement = np.linalg.norm((bboxes[:, :2] + bboxes[:, 2:]) / 2. -
+                                      (previous_bboxes[:, :2] + previous_bboxes[:, 2:]) / 2., axis=1)
+        height = np.maximum(bboxes[:, 3] - bboxes[:, 1], 1)
+        return float(np.mean(displacement / height))
+
+    def _count_at_risk(self):
+        """ Number of objects inside the risk zone
+        """
+        if self.risk_zone is None or len(self.tracks) == 0:
+            return 0
+        return int(np.count_nonzero(self.risk_zone(self.tracks.centroids)))
+
+    def _update_from_bbox(self, frame, bboxes, scores=None, classes=None):
         """ Update bounding boxes for known objects, add new ones, if any, and deallocate the dead ones.
 
             Args:
                 ``frame`` (np.array): frame to be processed
-                ``bboxes`` (list): list of bounding boxes coordinates (xmin, ymin, xmax, ymax)
+                ``bboxes`` (np.array): ``(N, 4)`` bounding boxes coordinates (xmin, ymin, xmax, ymax)
+                ``scores`` (np.array): ``(N,)`` detection confidences, if any
+                ``classes`` (np.array): ``(N,)`` object type ids, if any
         """
-
-        new_objects = []
+        bboxes = np.asarray(bboxes, dtype=int).reshape(-1, 4)
+        scores = np.zeros(len(bboxes)) if scores is None else np.asarray(scores)
+        classes = np.full(len(bboxes), -1, dtype=int) if classes is None else np.asarray(classes)
 
         # Decrease life for all current objects
-        for tracker in self.objects:
-            tracker.life -= 1
-
-        # Update current objects and create new ones given new set of bboxes
-        for bbox in bboxes:
-            centroid = [(bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2]
-            distances = [euclidean(centroid, tracking_obj.centroid)
-                         for tracking_obj in self.objects]
-
-            if len(self.objects) > 0:
-                nearest_tracking_obj = np.argmin(distances)
-                min_dist = distances[nearest_tracking_obj]
-            else:
-                nearest_tracking_obj = None
-                min_dist = np.inf
+        self.tracks.life -= 1
 
-            # max_distance is given by half of the human height
-            max_distance = int((bbox[2] - bbox[0]) / 2)
+        if self.motion_model is not None:
+            self._predict_motion()
 
-            if min_dist > max_distance:
-                logger.debug('new object')
-                start_time = datetime.now()
-                new_objects.append(TrackingObject(bbox[0], bbox[1], bbox[2], bbox[3],
-                                                  life=self.object_life_cycle, start_time=start_time,
-                                                  tracker=self.tracker_list[self.tracker_name]()))
+        # Pair detections and tracked objects, update the paired ones and create new ones for the rest
+        matches, unmatched_bboxes, _ = associate(bboxes, self.tracks.bboxes, min_iou=self.min_iou)
 
-                new_objects[-1].tracker.init(frame, (new_objects[-1].bbox_xmin, new_objects[-1].bbox_ymin,
-                                                     new_objects[-1].bbox_xmax - new_objects[-1].bbox_xmin,
-                                                     new_objects[-1].bbox_ymax - new_objects[-1].bbox_ymin))
+        bbox_idx, obj_idx = matches[:, 0], matches[:, 1]
+        self.tracks.bboxes[obj_idx] = bboxes[bbox_idx]
+        self.tracks.scores[obj_idx] = scores[bbox_idx]
+        self.tracks.life[obj_idx] += 1
 
-                # delete old tracker
-                if nearest_tracking_obj is not None:
-                    del self.objects[nearest_tracking_obj]
+        if self.motion_model is not None and len(matches) > 0:
+            self.motion_model.update(obj_idx, bboxes[bbox_idx])
 
+        if len(unmatched_bboxes) > 0:
+            logger.debug('{} new objects'.format(len(unmatched_bboxes)))
+            new_bboxes = bboxes[unmatched_bboxes]
+            trackers = None
+            if self.motion_model is not None:
+                self.motion_model.add(new_bboxes)
             else:
-                self.objects[nearest_tracking_obj].update_bbox(bbox[0], bbox[1], bbox[2], bbox[3])
-                self.objects[nearest_tracking_obj].life += 1
-
-        self.objects += new_objects
+                trackers = [self._create_tracker(frame, bbox) for bbox in new_bboxes.tolist()]
+            self.tracks.add(new_bboxes, life=self.object_life_cycle, start_time=time.time(), trackers=trackers,
+                            scores=scores[unmatched_bboxes], type_ids=classes[unmatched_bboxes])
 
         return self._remove_dead_objects()
 
+    def _create_tracker(self, frame, bbox):
+        """ Create an OpenCV tracker initialized on ``bbox`` (xmin, ymin, xmax, ymax)
+        """
+        tracker = self.tracker_list[self.tracker_name]()
+        tracker.init(frame, (bbox[0], bbox[1], bbox[2] - bbox[0], bbox[3] - bbox[1]))
+        return tracker
+
     def _update_from_tracker(self, frame):
         """ Update bbox from tracking algorithm
 
             Args:
                 ``frame`` (np.array): frame to be processed
         """
-        for obj in self.objects:
-            success, pos = obj.tracker.update(frame)
-            if success:
-                obj.update_bbox(int(pos[0]), int(pos[1]), int(pos[0] + pos[2]), int(pos[1] + pos[3]))
+        if self.motion_model is not None:
+            self._predict_motion()
+            return
+
+        if self.executor is not None:
+            # OpenCV releases the GIL while updating, results are applied in the objects order
+            results = list(self.executor.map(lambda tracker: tracker.update(frame), self.tracks.trackers))
+        else:
+            results = [tracker.update(frame) for tracker in self.tracks.trackers]
+
+        if not results:
+            self.n_failures = 0
+            return
+        success = np.array([r[0] for r in results], dtype=bool)
+        pos = np.array([r[1] for r in results], dtype=float).reshape(-1, 4)
+        self.n_failures = int(np.count_nonzero(~success))
+        pos[:, 2:] += pos[:, :2]  # (x, y, w, h) -> (xmin, ymin, xmax, ymax)
+        self.tracks.bboxes[success] = pos[success].astype(int)
+
+    def _predict_motion(self):
+        """ Advance the Kalman filter one frame and move every object to its predicted bbox
+        """
+        if len(self.tracks) > 0:
+            self.tracks.bboxes[:] = self.motion_model.predict()
 
     def _remove_dead_objects(self):
         """ Deallocate dead objects to stop tracking them
         """
-        dead_objects_idx = np.where(np.array([tracker.life for tracker in self.objects]) == 0)[0]
+        dead_objects_idx = np.flatnonzero(self.tracks.life <= 0)
 
         dead_objects = []
         if len(dead_objects_idx) > 0:
             logger.info('Deleting {} dead objects'.format(len(dead_objects_idx)))
 
-            end_time = datetime.now()
-            for i in sorted(dead_objects_idx, reverse=True):
-                offset = (end_time - self.objects[i].start_time).total_seconds()
-                dead_objects.append({'timestamp_start': self.objects[i].start_time, 'offset': offset})
-                del self.objects[i]
+            end_time = time.time()
+            for i in dead_objects_idx[::-1]:
+                start_time = float(self.tracks.start_times[i])
+                dead_objects.append({'timestamp_start': datetime.fromtimestamp(start_time),
+                                     'offset': end_time - start_time})
+            self.tracks.remove(dead_objects_idx)
+            if self.motion_model is not None:
+                self.motion_model.remove(dead_objects_idx)
         return dead_objects
 
     def get_objects(self):
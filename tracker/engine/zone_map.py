@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+import cv2
+import json
+import numpy as np
+
+
+def load_zones(path, camera_id=None):
+    """ Load the zones of a camera from a JSON file
+
+        The file maps camera ids to their list of zones, with an optional ``default`` entry used by
+        cameras that are not listed. Every zone is a dict with:
+        ``name`` (str), ``polygon`` (list of [x, y] relative to the frame size, i.e. in [0, 1]),
+        ``risk`` (int, 0 to 100), ``alert`` (bool, whether it is a risk zone for the tracker)
+        and ``color`` ([blue, green, red] used on the display overlay).
+        Zones listed later are drawn over the earlier ones.
+
+        Args:
+            ``path`` (str): JSON file path
+            ``camera_id`` (int or str): Camera id
+
+        Returns:
+            List of zones
+    """
+    with open(path) as zones_file:
+        zones_by_camera = json.load(zones_file)
+    zones = zones_by_camera.get(str(camera_id), zones_by_camera.get('default'))
+    assert zones is not None, 'No zones for camera {} in {}'.format(camera_id, path)
+    return zones
+
+
+def stripe_zones(n_stripes, bands, alert_from=1.):
+    """ Zones made of vertical stripes of the same width, with increasing risk from left to right
+
+        Args:
+            ``n_stripes`` (int): Number of stripes
+            ``bands`` (list(tuple)): (start, end, (blue, green, red)) color bands, start and end being
+                relative to the frame width. Stripes get the color of the band they start on
+            ``alert_from`` (float): Stripes starting from there, relative to the frame width, are alert zones
+
+        Returns:
+            List of zones
+    """
+    zones = []
+    for idx in range(n_stripes):
+        start, end = idx / float(n_stripes), (idx + 1) / float(n_stripes)
+        color = [c for s, e, c in bands if s <= start < e][0]
+        zones.append({'name': 'sector_{}'.format(idx),
+                      'polygon': [[start, 0], [end, 0], [end, 1], [start, 1]],
+                      'risk': int(round(100 * start)),
+                      'alert': start >= alert_from,
+                      'color': list(color)})
+    return zones
+
+
+class ZoneMap(object):
+
+    """ Pool zones rasterized into a label image
+
+        Every pixel holds the index of the zone it belongs to (0 when it is out of every zone, zone
+        ``i`` of the list gets label ``i + 1``), so finding the zone of any number of points is a
+        single indexing operation, and so are their names, risks and alert flags, kept in arrays
+        indexed by label.
+    """
+
+    def __init__(self, zones, frame_shape):
+        """ Constructor
+
+            Args:
+                ``zones`` (list(dict)): zones, see :func:`load_zones`
+                ``frame_shape`` (tuple): Shape (height, width, ...) of the frames
+        """
+        assert len(zones) < 256, 'At most 255 zones are supported'
+
+        self.zones = zones
+        self.frame_shape = tuple(frame_shape)
+        height, width = self.frame_shape[:2]
+
+        self.labels = np.zeros((height, width), dtype=np.uint8)
+        for label, zone in enumerate(zones, 1):
+            polygon = np.array(zone['polygon'], dtype=float) * [width, height]
+            cv2.fillPoly(self.labels, [np.round(polygon).astype(np.int32)], label)
+
+        self.names = np.array([None] + [zone.get('name') for zone in zones], dtype=object)
+        self.risks = np.array([0] + [zone.get('risk', 0) for zone in zones], dtype=int)
+        self.alerts = np.array([False] + [zone.get('alert', False) for zone in zones], dtype=bool)
+        self.colors = np.array([[0, 0, 0]] + [zone.get('color', [0, 0, 0]) for zone in zones], dtype=np.uint8)
+
+    def lookup(self, points):
+        """ Returns the ``(N,)`` zone labels of ``(N, 2)`` (x, y) points, e.g. the tracked centroids
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        height, width = self.labels.shape
+        x = np.clip(np.floor(points[:, 0]).astype(int), 0, width - 1)
+        y = np.clip(np.floor(points[:, 1]).astype(int), 0, height - 1)
+        return self.labels[y, x]
+
+    def risk(self, points):
+        return self.risks[self.lookup(points)]
+
+    def alert(self, points):
+        """ Whether or not every point lies on an alert zone
+        """
+        return self.alerts[self.lookup(points)]
+
+    def zone_names(self, points):
+        return self.names[self.lookup(points)]
+
+    def mask(self, frame_shape=None):
+        """ Returns the uint8 BGR overlay with the zone colors, e.g. for a
+            :class:`~rendering.FrameRenderer`
+        """
+        labels = self.labels
+        if frame_shape is not None and tuple(frame_shape[:2]) != labels.shape:
+            labels = cv2.resize(labels, (frame_shape[1], frame_shape[0]), interpolation=cv2.INTER_NEAREST)
+        return self.colors[labels]
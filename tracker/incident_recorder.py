@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+
+import collections
+import cv2
+import json
+import logging
+import numpy as np
+import os
+import queue
+import re
+import threading
+import time
+
+logging.basicConfig()
+logger = logging.getLogger('Incident-Recorder')
+logger.setLevel(logging.INFO)
+
+
+def incident_reason(track_ids, underwater_secs, risk_panic, on_alert, zones, max_underwater_secs, max_risk_panic):
+    """ Check whether a track is at risk: with its face in the water (see
+        :class:`~engine.face_detector.UnderwaterTimers`) for ``max_underwater_secs`` or more, or with a panic
+        risk of ``max_risk_panic`` or more on an alert zone. Tracks never seen with a face are not at risk
+        of drowning, their timer stays at 0
+
+        Args:
+            ``track_ids`` (list(int)): track ids
+            ``underwater_secs`` (np.array): ``(N,)`` seconds the face of every track has been in the water
+            ``risk_panic`` (np.array): ``(N,)`` panic risks
+            ``on_alert`` (np.array): ``(N,)`` whether every track is on an alert zone
+            ``zones`` (list(str)): zone name of every track
+            ``max_underwater_secs`` (float): underwater seconds from which a track is at risk
+            ``max_risk_panic`` (int): panic risk from which a track on an alert zone is at risk
+
+        Returns:
+            What is wrong, ``None`` if nothing is
+    """
+    underwater_secs = np.asarray(underwater_secs, dtype=float).reshape(-1)
+    underwater = np.flatnonzero(underwater_secs >= max_underwater_secs)
+    if len(underwater):
+        idx = underwater[0]
+        return 'Track {} under water for {:.1f} s'.format(track_ids[idx], underwater_secs[idx])
+    panic = np.flatnonzero((np.asarray(risk_panic).reshape(-1) >= max_risk_panic) & np.asarray(on_alert, dtype=bool))
+    if len(panic):
+        idx = panic[0]
+        return 'Track {} panicking on {}'.format(track_ids[idx], zones[idx])
+    return None
+
+
+class Incident(object):
+
+    """ A recorded incident: its frames go to ``<path>.mjpeg`` (concatenated JPEG images, readable by
+        ffmpeg or VLC) and its description, with the timestamp of every frame, to ``<path>.json``
+    """
+
+    def __init__(self, path, camera, reason, triggered_at, end):
+        self.path = path
+        self.camera = camera
+        self.reason = reason
+        self.triggered_at = triggered_at
+        self.end = end
+        self.timestamps = []
+
+    def describe(self):
+        return {'camera': self.camera, 'reason': self.reason, 'triggeredAt': self.triggered_at,
+                'start': self.timestamps[0] if self.timestamps else None,
+                'end': self.timestamps[-1] if self.timestamps else None, 'frames': self.timestamps}
+
+
+class IncidentRecorder(object):
+
+    """ Keeps the last ``pre_roll`` seconds of frames as JPEG images in a memory ring and, when an incident
+        is triggered, saves them to disk followed by the frames of the next ``post_roll`` seconds
+
+        :meth:`push` and :meth:`trigger` are cheap and can be called on every frame: they only hand the
+        latest frame or trigger over to a background encoder, frames coming faster than ``fps`` being
+        skipped. The encoder compresses the frames and keeps the ring, while a background writer saves
+        the incidents, so neither the encoding nor the disk stalls the inference loop.
+        Triggers during an incident extend it, by ``post_roll`` seconds after the last one.
+    """
+
+    def __init__(self, directory, camera=None, pre_roll=10., post_roll=10., fps=10., quality=80, rgb=True):
+        """ Constructor
+
+            Args:
+                ``directory`` (str): directory the incidents are saved to
+                ``camera``: camera id, part of the incident file names
+                ``pre_roll`` (float): Seconds of frames kept before a trigger
+                ``post_roll`` (float): Seconds of frames saved after the last trigger
+                ``fps`` (float): Max number of frames recorded per second
+                ``quality`` (int): JPEG quality, from 0 to 100
+                ``rgb`` (bool): Whether the frames are RGB, instead of BGR
+        """
+        self.directory = directory
+        self.camera = camera
+        self.pre_roll = pre_roll
+        self.post_roll = post_roll
+        self.frame_interval = 1. / fps
+        self.quality = quality
+        self.rgb = rgb
+        self.ring = collections.deque(maxlen=int(pre_roll * fps) + 1)
+        self.ring_bytes = 0
+        self.incidents = 0
+        self._incident = None
+        self._next_timestamp = None
+        self._frame = None
+        self._trigger = None
+        self._cond = threading.Condition()
+        self._running = False
+        self._encoder = None
+        self._writer = None
+        # enough for the pre-roll plus a few seconds of disk stall, the encoder waits beyond that
+        self._write_queue = queue.Queue(maxsize=int((pre_roll + post_roll) * fps) + 1)
+
+    def start(self):
+        """ Start the background encoder and writer
+        """
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        self._running = True
+        self._encoder = threading.Thread(target=self._encode_loop, name='IncidentRecorder-Encoder')
+        self._encoder.daemon = True
+        self._encoder.start()
+        self._writer = threading.Thread(target=self._write_loop, name='IncidentRecorder-Writer')
+        self._writer.daemon = True
+        self._writer.start()
+
+    def stop(self):
+        """ Save the incident in progress, if any, and stop the background encoder and writer
+        """
+        if self._encoder is None:
+            return
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._encoder.join()
+        self._write_queue.put(None)
+        self._writer.join()
+        self._encoder = self._writer = None
+
+    def push(self, frame, timestamp):
+        """ Record ``frame``, unless the last recorded one is more recent than ``1 / fps``
+
+            Args:
+                ``frame`` (numpy array): frame, copied as it may be drawn on afterwards
+                ``timestamp`` (float): frame timestamp, in seconds
+        """
+        if self._next_timestamp is not None and timestamp < self._next_timestamp:
+            return False
+        self._next_timestamp = timestamp + self.frame_interval
+        with self._cond:
+            self._frame = (timestamp, frame.copy())
+            self._cond.notify()
+        return True
+
+    def trigger(self, timestamp, reason):
+        """ Start an incident at ``timestamp``, or extend the one in progress
+
+            Args:
+                ``timestamp`` (float): trigger timestamp, in seconds, on the same clock as the frames
+                ``reason`` (str): what triggered it, saved with the incident
+        """
+        with self._cond:
+            if self._trigger is None:
+                self._trigger = (timestamp, reason)
+            else:
+                self._trigger = (timestamp, self._trigger[1])
+            self._cond.notify()
+
+    def _encode_loop(self):
+        while True:
+            with self._cond:
+                while self._frame is None and self._trigger is None and self._running:
+                    self._cond.wait()
+                frame, self._frame = self._frame, None
+                trigger, self._trigger = self._trigger, None
+                running = self._running
+            if trigger is not None:
+                self._start_incident(*trigger)
+            if frame is not None:
+                self._record(*frame)
+            if frame is None and trigger is None and not running:
+                break
+        if self._incident is not None:
+            self._close_incident()
+
+    def _record(self, timestamp, frame):
+        if self.rgb:
+            frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+        ok, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            return
+        jpeg = jpeg.tobytes()
+        if len(self.ring) == self.ring.maxlen:
+            self.ring_bytes -= len(self.ring[0][1])
+        self.ring.append((timestamp, jpeg))
+        self.ring_bytes += len(jpeg)
+        while self.ring[0][0] < timestamp - self.pre_roll:
+            self.ring_bytes -= len(self.ring.popleft()[1])
+
+        if self._incident is not None:
+            if timestamp > self._incident.end:
+                self._close_incident()
+            else:
+                self._write_queue.put(('frame', self._incident, timestamp, jpeg))
+
+    def _start_incident(self, timestamp, reason):
+        if self._incident is not None:
+            self._incident.end = max(self._incident.end, timestamp + self.post_roll)
+            return
+        name = 'incident_{}'.format(time.strftime('%Y%m%d-%H%M%S'))
+        if self.camera is not None:
+            name = '{}_{}'.format(name, re.sub(r'[^A-Za-z0-9_.-]', '_', str(self.camera)))
+        self._incident = Incident(os.path.join(self.directory, name), self.camera, reason, timestamp,
+                                  timestamp + self.post_roll)
+        self.incidents += 1
+        logger.info('Incident {}: {}'.format(name, reason))
+        self._write_queue.put(('open', self._incident))
+        # pre-roll
+        for frame_timestamp, jpeg in self.ring:
+            self._write_queue.put(('frame', self._incident, frame_timestamp, jpeg))
+
+    def _close_incident(self):
+        self._write_queue.put(('close', self._incident))
+        self._incident = None
+
+    def _write_loop(self):
+        files = {}
+        while True:
+            item = self._write_queue.get()
+            if item is None:
+                break
+            incident = item[1]
+            try:
+                if item[0] == 'open':
+                    files[incident] = open(incident.path + '.mjpeg', 'wb')
+                elif incident not in files:
+                    # could not be opened
+                    continue
+                elif item[0] == 'frame':
+                    files[incident].write(item[3])
+                    incident.timestamps.append(item[2])
+                else:
+                    files.pop(incident).close()
+                    with open(incident.path + '.json', 'w') as description_file:
+                        json.dump(incident.describe(), description_file)
+                    logger.info('Saved incident {} ({} frames)'.format(incident.path, len(incident.timestamps)))
+            except (IOError, OSError):
+                logger.exception('Could not save incident {}'.format(incident.path))
+        for incident_file in files.values():
+            incident_file.close()
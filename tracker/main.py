@@ -1,11 +1,16 @@
 # coding=utf-8
 
 import camera_app
+import config
 import logging
+import multi_camera_app
 
 logger = logging.getLogger(__name__)
 logging.getLogger().setLevel(logging.INFO)
 
 
 if __name__ == '__main__':
-    camera_app.start()
+    if config.CAMERA_IDS:
+        multi_camera_app.start()
+    else:
+        camera_app.start()
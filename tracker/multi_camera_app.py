@@ -0,0 +1,79 @@
+import config
+import logging
+import multiprocessing
+import os
+
+from camera_app import CameraApp, FRAME_SIZE, build_face_detector, build_tracker, build_zone_map
+from engine.detector_service import DetectorService
+from stream.opencv_stream import OpenCVStream
+
+logging.basicConfig()
+logger = logging.getLogger('Multi-Camera-App')
+logger.setLevel(logging.INFO)
+
+
+def status_file_for(camera_idx):
+    """ Returns the status file of a camera, e.g. ``status.json`` -> ``status_0.json``
+    """
+    root, ext = os.path.splitext(os.getenv('STATUS_FILE', '../status.json'))
+    return '{}_{}{}'.format(root, camera_idx, ext)
+
+
+def run_camera(camera_idx, camera_id, detector_service):
+    """ Camera process entry point: capture, tracking, face detection, status and drawing
+        run here while detection and movement classification are delegated to the shared detector service.
+    """
+    video_stream = OpenCVStream(camera_id, threaded=config.CAPTURE_THREADED, buffer_size=config.CAPTURE_BUFFER_SIZE)
+    zone_map = build_zone_map(camera_id)
+    app = CameraApp(video_stream=video_stream,
+                    object_estimator=build_tracker(detector_service.client(camera_idx), zone_map),
+                    movement_classifier=detector_service.classifier(camera_idx), face_detector=build_face_detector(),
+                    camera_id=camera_id, status_file=status_file_for(camera_idx), zone_map=zone_map)
+    if config.PIPELINED:
+        app.run_pipelined(queue_size=config.PIPELINE_QUEUE_SIZE)
+    else:
+        app.run()
+    logger.info('Camera {} finished. Frames dropped: {}'.format(camera_id, video_stream.frames_dropped))
+
+
+class MultiCameraApp:
+    """ Runs one :class:`~camera_app.CameraApp` process per camera, all of them sharing
+        a single :class:`~engine.detector_service.DetectorService`
+    """
+
+    def __init__(self, camera_ids, detector_service):
+        """ Constructor
+
+            Args:
+                ``camera_ids`` (list): Camera ids (int) or video file paths (str)
+                ``detector_service`` (:class:`~engine.detector_service.DetectorService`): shared detector
+        """
+        assert len(camera_ids) > 0, 'At least one camera must be provided'
+
+        self.camera_ids = camera_ids
+        self.detector_service = detector_service
+
+    def run(self):
+        """ Start the detector service and the camera processes and wait for the cameras to finish
+        """
+        self.detector_service.start()
+        processes = []
+        for camera_idx, camera_id in enumerate(self.camera_ids):
+            process = multiprocessing.Process(target=run_camera, args=(camera_idx, camera_id, self.detector_service),
+                                              name='Camera-{}'.format(camera_id))
+            process.start()
+            processes.append(process)
+        self.detector_service.watch(processes)
+        self.detector_service.stop()
+
+
+def start():
+    detector_service = DetectorService(len(config.CAMERA_IDS), FRAME_SIZE, max_batch_size=config.DETECTION_BATCH_SIZE,
+                                       max_batch_wait_ms=config.DETECTION_BATCH_WAIT_MS,
+                                       classifier_kwargs=dict(model_path=config.MOVEMENT_CLASSIFIER_MODEL_PATH,
+                                                              threshold=0.5,
+                                                              raw_input=config.MOVEMENT_CLASSIFIER_RAW_INPUT,
+                                                              window_size=config.FRAME_BUFFER_SIZE),
+                                       model_path=config.TRACKER_MODEL_PATH, id2name=config.ID_TO_NAME, threshold=0.5)
+    app = MultiCameraApp(config.CAMERA_IDS, detector_service)
+    app.run()
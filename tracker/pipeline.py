@@ -0,0 +1,124 @@
+import logging
+import queue
+import threading
+
+logging.basicConfig()
+logger = logging.getLogger('Pipeline')
+logger.setLevel(logging.INFO)
+
+# Marks the end of the stream. It is never dropped
+END = object()
+
+BLOCK = 'block'
+DROP_OLDEST = 'drop_oldest'
+DROP_NEWEST = 'drop_newest'
+
+
+class StageQueue(object):
+    """ Bounded queue between two pipeline stages
+
+        When the queue is full, ``policy`` tells what happens to a new item:
+        ``block`` waits for room, ``drop_oldest`` discards the oldest queued item to make room
+        (the consumer always gets the freshest data) and ``drop_newest`` discards the new item.
+    """
+
+    def __init__(self, maxsize, policy=BLOCK, stop_event=None):
+        """ Constructor
+
+            Args:
+                ``maxsize`` (int): Max number of queued items
+                ``policy`` (str): ``block``, ``drop_oldest`` or ``drop_newest``
+                ``stop_event`` (threading.Event): Event that aborts a blocked ``put`` or ``get``
+        """
+        assert policy in (BLOCK, DROP_OLDEST, DROP_NEWEST), 'Unknown drop policy {}'.format(policy)
+
+        self.policy = policy
+        self.stop_event = stop_event or threading.Event()
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize)
+
+    def put(self, item):
+        """ Enqueue ``item`` according to the drop policy
+
+            Returns:
+                Whether or not the item was enqueued
+        """
+        if self.policy == BLOCK or item is END:
+            while not self.stop_event.is_set():
+                try:
+                    self._queue.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        if self.policy == DROP_NEWEST:
+            try:
+                self._queue.put_nowait(item)
+                return True
+            except queue.Full:
+                self.dropped += 1
+                return False
+
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return True
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self):
+        """ Dequeue the next item, or :data:`END` if the pipeline was stopped
+        """
+        while not self.stop_event.is_set():
+            try:
+                return self._queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return END
+
+
+class Stage(threading.Thread):
+    """ Pipeline worker: applies ``fn`` to every item of ``input_queue`` and puts the
+        result, unless it is ``None``, into ``output_queue``. :data:`END` is forwarded downstream.
+        A source stage has no input queue, ``fn`` is called without arguments and the stream
+        finishes when it returns :data:`END`.
+
+        An exception raised by ``fn`` stops the pipeline and is kept in :attr:`error`, to be raised again
+        by whoever joins the stage.
+    """
+
+    def __init__(self, name, fn, input_queue=None, output_queue=None, stop_event=None):
+        super(Stage, self).__init__(name=name)
+        self.daemon = True
+        self.fn = fn
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.stop_event = stop_event or threading.Event()
+        self.processed = 0
+        self.error = None
+
+    def run(self):
+        try:
+            while not self.stop_event.is_set():
+                if self.input_queue is None:
+                    result = self.fn()
+                else:
+                    item = self.input_queue.get()
+                    result = END if item is END else self.fn(item)
+                if result is END:
+                    break
+                self.processed += 1
+                if result is not None and self.output_queue is not None:
+                    self.output_queue.put(result)
+        except Exception as e:
+            logger.exception('Stage {} failed'.format(self.name))
+            self.error = e
+            self.stop_event.set()
+        finally:
+            if self.output_queue is not None:
+                self.output_queue.put(END)
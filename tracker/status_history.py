@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+# Shared by the tracker (writer) and the API (reader): tracker/status_history.py and api/status_history.py
+# must stay identical, see check_copies.py
+
+import math
+import numpy as np
+import os
+import re
+
+MAGIC = b'STHIST01'
+
+# 64 bytes header, followed by ``capacity`` fixed-size records
+HEADER_DTYPE = np.dtype([('magic', 'S8'), ('capacity', '<u4'), ('max_tracks', '<u4'), ('head', '<u8'),
+                         ('reserved', 'S40')])
+
+TRACK_DTYPE = np.dtype([('id', '<i4'), ('risk_panic', '<i2'), ('underwater_seconds', '<f4'),
+                        ('panic_score', '<f4')])
+
+
+def record_dtype(max_tracks):
+    """ Returns the record of a status sample with room for ``max_tracks`` tracks
+    """
+    return np.dtype([('timestamp', '<f8'), ('risk_position', '<i2'), ('risk_panic', '<i2'),
+                     ('face_water_seconds', '<f4'), ('subject', '<i2', (4,)), ('n_tracks', '<u2'),
+                     ('tracks', TRACK_DTYPE, (max_tracks,))])
+
+
+def history_file_for(path, camera=None):
+    """ Returns the history file of a camera, e.g. ``history.bin`` -> ``history_0.bin``
+    """
+    if camera is None:
+        return path
+    root, ext = os.path.splitext(path)
+    return '{}_{}{}'.format(root, re.sub(r'[^A-Za-z0-9_.-]', '_', str(camera)), ext)
+
+
+class StatusHistory(object):
+
+    """ Ring of status samples in a memory-mapped file of fixed-size binary records
+
+        The file starts with a header holding the capacity and the number of records ever written
+        (``head``), followed by ``capacity`` records, overwritten in circular order. Samples are
+        appended in time order at most once every ``interval`` seconds, so a time range is found
+        with a binary search, see :class:`StatusHistoryReader`. There must be a single writer per file.
+
+        A sample keeps at most ``max_tracks`` tracks, the ones most at risk: first those with their
+        face in the water for ``underwater_seconds`` or more, then by panic risk, then by seconds in
+        the water.
+    """
+
+    def __init__(self, path, capacity=86400, max_tracks=8, interval=1., underwater_seconds=10.):
+        """ Constructor. An existing file with the same layout is appended to, otherwise it is recreated
+
+            Args:
+                ``path`` (str): history file path
+                ``capacity`` (int): Max number of samples kept
+                ``max_tracks`` (int): Max number of tracks kept per sample
+                ``interval`` (float): Min time between two samples, in seconds
+                ``underwater_seconds`` (float): Seconds in the water from which a track is kept first
+        """
+        self.path = path
+        self.capacity = capacity
+        self.max_tracks = max_tracks
+        self.interval = interval
+        self.underwater_seconds = underwater_seconds
+        self.dtype = record_dtype(max_tracks)
+        size = HEADER_DTYPE.itemsize + capacity * self.dtype.itemsize
+
+        if not self._is_compatible(size):
+            with open(path, 'wb') as history_file:
+                history_file.truncate(size)
+            header = np.memmap(path, dtype=HEADER_DTYPE, mode='r+', shape=(1,))
+            header['magic'], header['capacity'], header['max_tracks'] = MAGIC, capacity, max_tracks
+            header.flush()
+            del header
+
+        self._header = np.memmap(path, dtype=HEADER_DTYPE, mode='r+', shape=(1,))
+        self._records = np.memmap(path, dtype=self.dtype, mode='r+', offset=HEADER_DTYPE.itemsize,
+                                  shape=(capacity,))
+        head = int(self._header['head'][0])
+        self.last_timestamp = float(self._records['timestamp'][(head - 1) % capacity]) if head > 0 else -math.inf
+
+    def _is_compatible(self, size):
+        if not os.path.exists(self.path) or os.path.getsize(self.path) != size:
+            return False
+        header = np.fromfile(self.path, dtype=HEADER_DTYPE, count=1)[0]
+        return (header['magic'] == MAGIC and header['capacity'] == self.capacity and
+                header['max_tracks'] == self.max_tracks)
+
+    def append(self, status):
+        """ Append a status sample, unless the last one is more recent than ``interval``
+
+            Args:
+                ``status`` (dict): status, as published by the app
+
+            Returns:
+                Whether or not the sample was appended
+        """
+        timestamp = status.get('updatedAt', 0) / 1000.
+        if timestamp - self.last_timestamp < self.interval:
+            return False
+
+        head = int(self._header['head'][0])
+        record = self._records[head % self.capacity]
+        record['timestamp'] = timestamp
+        record['risk_position'] = status.get('riskPosition', 0)
+        record['risk_panic'] = status.get('riskPanic', 0)
+        record['face_water_seconds'] = status.get('faceWaterSeconds', 0)
+        subject = status.get('subject') or {}
+        record['subject'] = [subject.get(k, -1) for k in ('xmin', 'ymin', 'xmax', 'ymax')]
+
+        risk_panic = status.get('trackRiskPanic', {})
+        underwater = status.get('trackUnderwaterSeconds', {})
+        panic_scores = status.get('trackPanic', {})
+        track_ids = sorted(set(risk_panic) | set(underwater), key=lambda track_id: self._risk(
+            underwater.get(track_id, 0.), risk_panic.get(track_id, 0)), reverse=True)
+        track_ids = sorted(track_ids[:self.max_tracks], key=int)
+        record['n_tracks'] = len(track_ids)
+        tracks = record['tracks']
+        tracks[:] = (-1, 0, 0., np.nan)
+        for idx, track_id in enumerate(track_ids):
+            tracks[idx] = (int(track_id), risk_panic.get(track_id, 0), underwater.get(track_id, 0.),
+                           panic_scores.get(track_id, np.nan))
+
+        # the record is complete before readers can see it
+        self._header['head'] = head + 1
+        self.last_timestamp = timestamp
+        return True
+
+    def _risk(self, underwater_seconds, risk_panic):
+        """ Sort key of a track, the highest being the most at risk
+        """
+        return underwater_seconds >= self.underwater_seconds, risk_panic, underwater_seconds
+
+    def close(self):
+        self._records.flush()
+        self._header.flush()
+
+
+class StatusHistoryReader(object):
+
+    """ Read-only view over a :class:`StatusHistory` file, being written by another process
+    """
+
+    def __init__(self, path):
+        """ Constructor
+
+            Args:
+                ``path`` (str): history file path
+        """
+        self.path = path
+        self._header = np.memmap(path, dtype=HEADER_DTYPE, mode='r', shape=(1,))
+        assert self._header['magic'][0] == MAGIC, '{} is not a status history file'.format(path)
+        self.capacity = int(self._header['capacity'][0])
+        self.max_tracks = int(self._header['max_tracks'][0])
+        self._records = np.memmap(path, dtype=record_dtype(self.max_tracks), mode='r',
+                                  offset=HEADER_DTYPE.itemsize, shape=(self.capacity,))
+
+    @property
+    def head(self):
+        return int(self._header['head'][0])
+
+    def _bisect(self, first, last, timestamp):
+        """ Index, in ``[first, last)``, of the first record not older than ``timestamp``
+        """
+        timestamps = self._records['timestamp']
+        while first < last:
+            middle = (first + last) // 2
+            if timestamps[middle % self.capacity] < timestamp:
+                first = middle + 1
+            else:
+                last = middle
+        return first
+
+    def query(self, start=None, end=None, limit=None):
+        """ Samples within a time range, oldest first
+
+            Args:
+                ``start`` (float): Min timestamp, in seconds, inclusive
+                ``end`` (float): Max timestamp, in seconds, exclusive
+                ``limit`` (int): Max number of samples
+
+            Returns:
+                Array of records
+        """
+        # the oldest slot is the next one to be overwritten, maybe being written right now: never read it
+        head = self.head
+        first, last = max(head - self.capacity + 1, 0), head
+        if start is not None:
+            first = self._bisect(first, last, start)
+        if end is not None:
+            last = self._bisect(first, last, end)
+        if limit is not None:
+            last = min(last, first + limit)
+        records = self._records[np.arange(first, last) % self.capacity]
+        # drop the records the writer overwrote, or started to, while they were being copied
+        overwritten = self.head - self.capacity + 1 - first
+        return records[max(overwritten, 0):]
+
+    def query_dicts(self, start=None, end=None, limit=None):
+        """ Same as :meth:`query`, as status dicts
+        """
+        samples = []
+        for record in self.query(start, end, limit):
+            xmin, ymin, xmax, ymax = record['subject'].tolist()
+            samples.append({
+                'updatedAt': int(round(record['timestamp'] * 1000)),
+                'riskPosition': int(record['risk_position']),
+                'riskPanic': int(record['risk_panic']),
+                'faceWaterSeconds': round(float(record['face_water_seconds']), 2),
+                'subject': {'xmin': xmin, 'ymin': ymin, 'xmax': xmax, 'ymax': ymax} if xmin >= 0 else {},
+                'tracks': [{'id': int(track['id']), 'riskPanic': int(track['risk_panic']),
+                            'underwaterSeconds': round(float(track['underwater_seconds']), 2),
+                            'panicScore': None if np.isnan(track['panic_score']) else
+                            round(float(track['panic_score']), 2)}
+                           for track in record['tracks'][:record['n_tracks']]]
+            })
+        return samples
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+import json
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+
+logging.basicConfig()
+logger = logging.getLogger('Status-Publisher')
+logger.setLevel(logging.INFO)
+
+# os.umask can only be read by setting it
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+
+class StatusPublisher(object):
+
+    """ Publishes the app status to a JSON file from a background writer
+
+        :meth:`publish` is cheap and can be called on every frame: it only keeps the latest status,
+        if it changed since the last one. The writer coalesces the pending updates and writes at most
+        once every ``interval`` seconds, atomically (a temporary file renamed over the status file),
+        so readers never see a half-written status. While the status does not change, the writer
+        republishes the last one every ``interval`` seconds with a fresh ``updatedAt``, as a heartbeat
+        telling the readers the app is alive.
+
+        With ``socket_path`` set, every new status is also sent right away, as a datagram, to the
+        Unix socket the API listens on (see ``api/status_store.py``). Datagrams are dropped while
+        nobody listens. With ``history`` set, the writer also samples the statuses into a
+        :class:`~status_history.StatusHistory`.
+    """
+
+    def __init__(self, path, interval=0.2, socket_path=None, history=None):
+        """ Constructor
+
+            Args:
+                ``path`` (str): status file path
+                ``interval`` (float): Min time between two writes, and time between two heartbeats, in seconds
+                ``socket_path`` (str): Unix datagram socket the statuses are pushed to, if any
+                ``history`` (:class:`~status_history.StatusHistory`): status history, if any
+        """
+        self.path = path
+        self.interval = interval
+        self.socket_path = socket_path
+        self.history = history
+        self._socket = None
+        if socket_path:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._socket.setblocking(False)
+        self.published = 0
+        self._payload = None
+        self._pending = None
+        self._cond = threading.Condition()
+        self._writer = None
+        self._running = False
+
+    def start(self):
+        """ Start the background writer
+        """
+        self._running = True
+        self._writer = threading.Thread(target=self._write_loop, name='StatusPublisher-Writer')
+        self._writer.daemon = True
+        self._writer.start()
+
+    def stop(self):
+        """ Write the pending status, if any, and stop the background writer
+        """
+        if self._writer is None:
+            return
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self._writer.join()
+        self._writer = None
+        if self.history is not None:
+            self.history.close()
+
+    def publish(self, status):
+        """ Queue ``status`` to be written, unless it is the same as the last one
+
+            Args:
+                ``status`` (dict): JSON serializable status. ``updatedAt`` is set to the time it is published
+        """
+        payload = json.dumps(status, sort_keys=True)
+        if payload == self._payload:
+            return False
+        self._payload = payload
+        status = json.loads(payload)
+        status['updatedAt'] = int(round(time.time() * 1000))
+        if self._socket is not None:
+            self._send(status)
+        with self._cond:
+            self._pending = status
+            self._cond.notify()
+        return True
+
+    def _send(self, status):
+        try:
+            self._socket.sendto(json.dumps(status).encode('utf-8'), self.socket_path)
+        except (IOError, OSError):
+            # the API is not listening or is behind, the file still has the status
+            pass
+
+    def _write_loop(self):
+        last_write, status = 0., None
+        while True:
+            with self._cond:
+                # wait for a new status, or for the next heartbeat once a status was written
+                while self._pending is None and self._running:
+                    if status is None:
+                        self._cond.wait()
+                        continue
+                    wait = last_write + self.interval - time.time()
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                if self._pending is None and not self._running:
+                    break
+                # let more updates coalesce into this write, publish() wakes us up before the deadline
+                wait = last_write + self.interval - time.time()
+                while wait > 0 and self._running:
+                    self._cond.wait(wait)
+                    wait = last_write + self.interval - time.time()
+                heartbeat = self._pending is None
+                if heartbeat:
+                    status = dict(status, updatedAt=int(round(time.time() * 1000)))
+                else:
+                    status, self._pending = self._pending, None
+            if heartbeat and self._socket is not None:
+                self._send(status)
+            try:
+                self._write(status)
+            except (IOError, OSError):
+                logger.exception('Could not write status to {}'.format(self.path))
+            if self.history is not None:
+                self.history.append(status)
+            last_write = time.time()
+
+    def _write(self, status):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.status-', suffix='.json')
+        try:
+            # mkstemp creates the file readable by its owner only, give it the usual permissions
+            os.fchmod(fd, 0o666 & ~UMASK)
+            with os.fdopen(fd, 'w') as tmp_file:
+                json.dump(status, tmp_file)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+        self.published += 1
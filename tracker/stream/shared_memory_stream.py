@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+
+import cv2
+import ctypes
+import logging
+import multiprocessing
+import numpy as np
+
+from stream.base_stream import BaseVideoStream
+from stream.opencv_stream import OpenCVStream
+
+logging.basicConfig()
+logger = logging.getLogger('SharedMemory-VideoStream')
+logger.setLevel(logging.INFO)
+
+
+class SharedFrameRing(object):
+
+    """ Fixed-size ring of preallocated uint8 frame slots in shared memory
+
+        One capture process writes frames with :meth:`write` and any number of processes
+        read them by slot index without copying (the ring must be handed to the child processes
+        at creation time, e.g. as a ``multiprocessing.Process`` argument).
+
+        Each slot carries the sequence number and the capture timestamp of the frame it holds. The
+        sequence number is cleared while the slot is being overwritten, so a reader can copy a frame
+        and then check with :meth:`is_valid` that it was not overwritten meanwhile (seqlock style).
+    """
+
+    def __init__(self, frame_shape, slots=8):
+        """ Constructor
+
+            Args:
+                ``frame_shape`` (tuple): Shape (height, width, channels) of every frame
+                ``slots`` (int): Number of frames kept in the ring
+        """
+        assert slots > 1, 'Ring must have at least 2 slots'
+
+        self.frame_shape = tuple(frame_shape)
+        self.slots = slots
+        self._frames = multiprocessing.RawArray(ctypes.c_uint8, slots * int(np.prod(self.frame_shape)))
+        self._slot_seq = multiprocessing.RawArray(ctypes.c_int64, slots)
+        self._slot_timestamp = multiprocessing.RawArray(ctypes.c_double, slots)
+        self._head = multiprocessing.RawValue(ctypes.c_int64, 0)
+        self._closed = multiprocessing.RawValue(ctypes.c_bool, False)
+        self._cond = multiprocessing.Condition()
+        self._views = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_views'] = None
+        return state
+
+    @property
+    def frames(self):
+        """ Returns the (slots, height, width, channels) numpy view over the shared buffer
+        """
+        if self._views is None:
+            self._views = np.frombuffer(self._frames, dtype=np.uint8).reshape((self.slots,) + self.frame_shape)
+        return self._views
+
+    @property
+    def head(self):
+        """ Returns the sequence number of the next frame to be written
+        """
+        return self._head.value
+
+    @property
+    def closed(self):
+        return self._closed.value
+
+    def write(self, frame, timestamp=0.):
+        """ Copy a frame into the next slot and wake up the readers
+
+            Args:
+                ``frame`` (np.array): uint8 frame with shape ``frame_shape``
+                ``timestamp`` (float): capture timestamp of the frame, in seconds
+
+            Returns:
+                Sequence number of the written frame
+        """
+        seq = self._head.value
+        slot = seq % self.slots
+        self._slot_seq[slot] = -1
+        self.frames[slot] = frame
+        with self._cond:
+            self._slot_seq[slot] = seq
+            self._slot_timestamp[slot] = timestamp
+            self._head.value = seq + 1
+            self._cond.notify_all()
+        return seq
+
+    def wait(self, after_seq, timeout=None):
+        """ Block until a frame newer than ``after_seq`` is written or the ring is closed
+
+            Returns:
+                Sequence number of the newest frame, or ``None`` if there is none
+        """
+        with self._cond:
+            while self._head.value - 1 <= after_seq and not self._closed.value:
+                if not self._cond.wait(timeout):
+                    break
+            seq = self._head.value - 1
+        return seq if seq > after_seq else None
+
+    def slot_of(self, seq):
+        return seq % self.slots
+
+    def frame(self, slot):
+        """ Returns a zero-copy view of the frame held by ``slot``
+        """
+        return self.frames[slot]
+
+    def timestamp(self, slot):
+        """ Returns the capture timestamp of the frame held by ``slot``
+        """
+        return self._slot_timestamp[slot]
+
+    def is_valid(self, seq):
+        """ Whether the frame ``seq`` is still held by its slot and is not the next one to be overwritten,
+            which may be happening right now. Check it after copying the frame: the copy is good if it still is
+        """
+        return self._slot_seq[seq % self.slots] == seq and self._head.value - seq < self.slots
+
+    def close(self):
+        """ Signal readers that no more frames will be written
+        """
+        with self._cond:
+            self._closed.value = True
+            self._cond.notify_all()
+
+
+class SharedMemoryStream(BaseVideoStream):
+
+    """ Video stream reading frames from a :class:`SharedFrameRing`
+
+        Frames are returned as zero-copy views over the shared slots, always the newest one.
+        A view stays valid until the writer wraps around the ring, so consumers should copy
+        (or transform) it before keeping it for longer than ``slots`` frames.
+    """
+
+    def __init__(self, ring):
+        """ Constructor
+
+            Args:
+                ``ring`` (:class:`SharedFrameRing`): shared frame ring filled by a capture process
+        """
+        self.ring = ring
+        self.last_seq = -1
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.timestamp = None
+
+    def initialize(self):
+        """ There is nothing to be done here, the ring is owned by its creator
+        """
+        pass
+
+    def next_frame(self):
+        """ Returns the newest frame as RGB numpy array view
+        """
+        seq = self.ring.wait(self.last_seq)
+        if seq is None:
+            logger.info('Streaming finished')
+            return None
+        self.frames_dropped += seq - self.last_seq - 1
+        self.frames_read += 1
+        self.last_seq = seq
+        slot = self.ring.slot_of(seq)
+        self.timestamp = self.ring.timestamp(slot)
+        return self.ring.frame(slot)
+
+
+def capture_to_ring(ring, camera_id, threaded=False, buffer_size=1):
+    """ Capture process entry point: read frames from an :class:`~stream.opencv_stream.OpenCVStream`
+        and write them, resized to the ring frame shape, into the shared ring.
+
+        Args:
+            ``ring`` (:class:`SharedFrameRing`): ring to be filled
+            ``camera_id`` (int or str): Camera id (int) or video file path (str)
+            ``threaded`` (bool): Whether or not the capture uses a background reader
+            ``buffer_size`` (int): Max number of decoded frames kept by the background reader
+    """
+    video_stream = OpenCVStream(camera_id, threaded=threaded, buffer_size=buffer_size)
+    video_stream.initialize()
+    height, width = ring.frame_shape[:2]
+    try:
+        while True:
+            frame = video_stream.next_frame()
+            if frame is None:
+                break
+            if frame.shape[:2] != (height, width):
+                frame = cv2.resize(frame, (width, height))
+            ring.write(frame, video_stream.timestamp)
+    finally:
+        ring.close()
+
+
+def start_capture_process(ring, camera_id, **kwargs):
+    """ Start :func:`capture_to_ring` on a daemon process and return it
+    """
+    process = multiprocessing.Process(target=capture_to_ring, args=(ring, camera_id), kwargs=kwargs,
+                                      name='Capture-{}'.format(camera_id))
+    process.daemon = True
+    process.start()
+    return process
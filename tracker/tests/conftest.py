@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the tracker modules are imported as top-level modules, as when running from the tracker directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,50 @@
+import numpy as np
+
+from engine.face_detector import UnderwaterTimers
+
+BBOX = (100, 100, 200, 300)
+FACE = (130, 120, 40, 40)
+FPS = 10.
+
+
+def run(timers, visible, start=0):
+    seconds = None
+    for frame in range(start, start + len(visible)):
+        faces = [FACE] if visible[frame - start] else []
+        seconds = timers.update([1], [BBOX], faces, frame / FPS)
+    return seconds
+
+
+def test_face_visible_for_n_frames():
+    timers = UnderwaterTimers(tolerance_frames=3)
+    seconds = run(timers, [True] * 21)
+    np.testing.assert_allclose(seconds, [2.])
+
+
+def test_no_face_stays_at_zero():
+    timers = UnderwaterTimers(tolerance_frames=3)
+    seconds = run(timers, [False] * 50)
+    np.testing.assert_allclose(seconds, [0.])
+
+
+def test_missed_faces_within_tolerance_keep_the_timer():
+    timers = UnderwaterTimers(tolerance_frames=3)
+    seconds = run(timers, [True] * 11 + [False] * 3)
+    np.testing.assert_allclose(seconds, [1.])
+    seconds = run(timers, [True] * 5, start=14)
+    np.testing.assert_allclose(seconds, [1.8])
+
+
+def test_timer_is_reset_beyond_tolerance():
+    timers = UnderwaterTimers(tolerance_frames=3)
+    seconds = run(timers, [True] * 11 + [False] * 4)
+    np.testing.assert_allclose(seconds, [0.])
+    seconds = run(timers, [True] * 6, start=15)
+    np.testing.assert_allclose(seconds, [0.5])
+
+
+def test_tracks_are_timed_separately():
+    timers = UnderwaterTimers()
+    timers.update([1, 2], [BBOX, (400, 100, 500, 300)], [FACE], 0.)
+    seconds = timers.update([2, 1], [(400, 100, 500, 300), BBOX], [FACE], 1.5)
+    np.testing.assert_allclose(seconds, [0., 1.5])
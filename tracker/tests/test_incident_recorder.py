@@ -0,0 +1,29 @@
+import numpy as np
+
+from engine.face_detector import UnderwaterTimers
+from incident_recorder import incident_reason
+
+BBOX = (100, 100, 200, 300)
+
+
+def reason(underwater_secs, risk_panic=(30,), on_alert=(False,)):
+    return incident_reason([7], underwater_secs, np.array(risk_panic), np.array(on_alert), ['deep end'], 10., 75)
+
+
+def test_track_without_face_does_not_trigger():
+    timers = UnderwaterTimers(tolerance_frames=3)
+    for frame in range(300):
+        seconds = timers.update([7], [BBOX], [], frame / 10.)
+    assert reason(seconds) is None
+
+
+def test_face_in_the_water_triggers():
+    timers = UnderwaterTimers(tolerance_frames=3)
+    for frame in range(101):
+        seconds = timers.update([7], [BBOX], [(130, 120, 40, 40)], frame / 10.)
+    assert reason(seconds) == 'Track 7 under water for 10.0 s'
+
+
+def test_panic_triggers_on_alert_zone_only():
+    assert reason([0.], risk_panic=(75,)) is None
+    assert reason([0.], risk_panic=(75,), on_alert=(True,)) == 'Track 7 panicking on deep end'
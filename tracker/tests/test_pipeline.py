@@ -0,0 +1,28 @@
+import threading
+
+from pipeline import BLOCK, END, Stage, StageQueue
+
+
+def test_failed_stage_keeps_its_error_and_stops_the_pipeline():
+    stop_event = threading.Event()
+    output_queue = StageQueue(2, BLOCK, stop_event)
+
+    def fail():
+        raise ValueError('no frame')
+
+    stage = Stage('Source', fail, None, output_queue, stop_event)
+    stage.start()
+    stage.join()
+    assert isinstance(stage.error, ValueError)
+    assert stop_event.is_set()
+    assert output_queue.get() is END
+
+
+def test_finished_stage_has_no_error():
+    items = iter(range(3))
+    output_queue = StageQueue(4)
+    stage = Stage('Source', lambda: next(items, END), None, output_queue)
+    stage.start()
+    stage.join()
+    assert stage.error is None
+    assert stage.processed == 3
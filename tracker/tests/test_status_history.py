@@ -0,0 +1,57 @@
+import numpy as np
+
+from status_history import StatusHistory, StatusHistoryReader
+
+
+def status(timestamp, **fields):
+    status = {'updatedAt': int(timestamp * 1000)}
+    status.update(fields)
+    return status
+
+
+def test_wraparound_at_capacity(tmpdir):
+    path = str(tmpdir.join('history.bin'))
+    history = StatusHistory(path, capacity=10, interval=1.)
+    reader = StatusHistoryReader(path)
+    for second in range(10):
+        assert history.append(status(second, riskPosition=second))
+    # the oldest slot is the next one to be overwritten, it is never returned
+    records = reader.query()
+    np.testing.assert_array_equal(records['timestamp'], np.arange(1, 10))
+    np.testing.assert_array_equal(records['risk_position'], np.arange(1, 10))
+
+    history.append(status(10, riskPosition=10))
+    records = reader.query()
+    np.testing.assert_array_equal(records['timestamp'], np.arange(2, 11))
+    np.testing.assert_array_equal(reader.query(start=5, end=8)['risk_position'], [5, 6, 7])
+
+
+def test_query_drops_records_overwritten_while_copied(tmpdir):
+    path = str(tmpdir.join('history.bin'))
+    history = StatusHistory(path, capacity=10, interval=1.)
+    reader = StatusHistoryReader(path)
+    for second in range(12):
+        history.append(status(second))
+
+    copy = reader._records.__getitem__
+
+    def write_while_copying(index):
+        history.append(status(12))
+        return copy(index)
+
+    reader._records = type('Records', (), {'__getitem__': staticmethod(write_while_copying)})()
+    records = reader.query()
+    # once 12 is written, the slot of 3 is the next one to be overwritten
+    np.testing.assert_array_equal(records['timestamp'], np.arange(4, 12))
+
+
+def test_tracks_most_at_risk_are_kept(tmpdir):
+    path = str(tmpdir.join('history.bin'))
+    history = StatusHistory(path, capacity=10, max_tracks=2, underwater_seconds=10.)
+    risk_panic = dict((str(track_id), 30) for track_id in range(1, 9))
+    risk_panic.update({'9': 30, '10': 75})
+    underwater = dict((str(track_id), 0.) for track_id in range(1, 11))
+    underwater['9'] = 25.
+    history.append(status(0, trackRiskPanic=risk_panic, trackUnderwaterSeconds=underwater))
+    tracks = StatusHistoryReader(path).query_dicts()[0]['tracks']
+    assert [track['id'] for track in tracks] == [9, 10]
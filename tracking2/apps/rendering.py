@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+.. module:: apps
+   :platform: Unix
+   :synopsis: Frame rendering: bboxes, text labels and pool mask overlay
+
+"""
+
+import cv2
+import numpy as np
+
+BBOX_COLOR = (34, 34, 178)
+TEXT_COLOR = (255, 255, 255)
+TEXT_ORIGIN = (20, 20)
+TEXT_LINE_HEIGHT = 15
+
+
+def band_mask(frame_shape, bands):
+    """ Build a uint8 BGR mask made of vertical bands
+
+        Args:
+            ``frame_shape`` (tuple): Shape (height, width, channels) of the frames
+            ``bands`` (list(tuple)): (start, end, (blue, green, red)) of every band, start and end
+                being relative to the frame width
+
+        Returns:
+            uint8 mask with shape ``frame_shape``
+    """
+    mask = np.zeros(frame_shape, dtype=np.uint8)
+    width = frame_shape[1]
+    for start, end, color in bands:
+        mask[:, int(width * start):int(width * end)] = color
+    return mask
+
+
+class FrameRenderer(object):
+
+    """ Draws bboxes and text labels on a frame and blends it with a mask overlay for display
+
+        Everything is done with uint8 buffers preallocated once per frame size: the mask, given by
+        ``mask_fn``, is built once per frame size, the frame is converted to BGR and blended with
+        ``cv2.addWeighted`` into the same output buffer on every frame. Text labels are rasterized
+        into a small cached overlay that is only redrawn when the text changes.
+    """
+
+    def __init__(self, mask_fn, alpha=0.6, rgb=True):
+        """ Constructor
+
+            Args:
+                ``mask_fn`` (callable): Returns the uint8 BGR mask for a given frame shape
+                ``alpha`` (float): Weight of the frame on the blend, the mask gets ``1 - alpha``
+                ``rgb`` (bool): Whether or not the frames are RGB (they are converted to BGR)
+        """
+        self.mask_fn = mask_fn
+        self.alpha = alpha
+        self.rgb = rgb
+        self._shape = None
+        self._mask = None
+        self._out = None
+        self._labels = None
+        self._label_overlay = None
+
+    def _allocate(self, shape):
+        self._shape = shape
+        self._mask = np.ascontiguousarray(self.mask_fn(shape), dtype=np.uint8)
+        self._out = np.empty(shape, dtype=np.uint8)
+        self._labels = None
+
+    def render(self, frame, bboxes=(), labels=()):
+        """ Render a frame
+
+            Args:
+                ``frame`` (numpy array): uint8 image. Bboxes and labels are drawn on it, in place
+                ``bboxes`` (list(tuple)): bboxes (xmin, ymin, xmax, ymax)
+                ``labels`` (list(str)): text lines written on the top left corner
+
+            Returns:
+                The blended BGR frame. It is an internal buffer, overwritten on the next call
+        """
+        if frame.shape != self._shape:
+            self._allocate(frame.shape)
+
+        for bbox in bboxes:
+            cv2.rectangle(frame, (bbox[0], bbox[1]), (bbox[2], bbox[3]), BBOX_COLOR, thickness=2)
+        self._draw_labels(frame, tuple(labels))
+
+        if self.rgb:
+            cv2.cvtColor(frame, cv2.COLOR_RGB2BGR, dst=self._out)
+            src = self._out
+        else:
+            src = frame
+        cv2.addWeighted(src, self.alpha, self._mask, 1. - self.alpha, 0., dst=self._out)
+        return self._out
+
+    def _draw_labels(self, frame, labels):
+        if not labels:
+            return
+        if labels != self._labels:
+            height = min(TEXT_ORIGIN[1] + TEXT_LINE_HEIGHT * len(labels), frame.shape[0])
+            overlay = np.zeros((height,) + frame.shape[1:], dtype=np.uint8)
+            for idx, label in enumerate(labels):
+                cv2.putText(overlay, label, (TEXT_ORIGIN[0], TEXT_ORIGIN[1] + idx * TEXT_LINE_HEIGHT),
+                            cv2.FONT_HERSHEY_DUPLEX, 0.5, TEXT_COLOR, lineType=cv2.LINE_AA)
+            self._labels = labels
+            self._label_overlay = overlay
+        # text is white on black, so a max composes it (anti-aliasing included) over the frame
+        region = frame[:self._label_overlay.shape[0]]
+        cv2.max(region, self._label_overlay, dst=region)
@@ -9,15 +9,16 @@
 """
 
 import cv2
-import numpy as np
 
 import json
 from copy import copy
+from functools import partial
 
 from video_stream.base_stream import BaseVideoStream
 from video_stream.opencv_stream import OpenCVStream
 from engine import detector, tracker
 from engine.base_object_estimator import BaseObjectEstimator
+from apps.rendering import FrameRenderer, band_mask
 
 from datetime import datetime
 from argparse import ArgumentParser
@@ -31,21 +32,10 @@ logger.setLevel(logging.INFO)
 # FRAME_SIZE = (480,360,3)
 # FRAME_SIZE = (360,480,3)
 FRAME_SIZE = (480,640,3)
-POOL_BORDER_W = int(FRAME_SIZE[1]*0.3)
-
-POOL_MASK = np.zeros(FRAME_SIZE)
-
-POOL_MASK[:,:POOL_BORDER_W,0] = 212 # BLUE
-POOL_MASK[:,:POOL_BORDER_W,1] = 255 # GREEN
-POOL_MASK[:,:POOL_BORDER_W,2] = 127 # RED
-
-POOL_MASK[:,POOL_BORDER_W:2*POOL_BORDER_W,0] = 96 # BLUE
-POOL_MASK[:,POOL_BORDER_W:2*POOL_BORDER_W,1] = 247 # GREEN
-POOL_MASK[:,POOL_BORDER_W:2*POOL_BORDER_W,2] = 242 # RED
-
-POOL_MASK[:,2*POOL_BORDER_W:,0] = 96 # BLUE
-POOL_MASK[:,2*POOL_BORDER_W:,1] = 109 # GREEN
-POOL_MASK[:,2*POOL_BORDER_W:,2] = 247 # RED
+# (start, end, (blue, green, red)), relative to the frame width
+POOL_BANDS = [(0., 0.3, (212, 255, 127)),
+              (0.3, 0.6, (96, 247, 242)),
+              (0.6, 1., (96, 109, 247))]
 
 class CameraApp:
     """ App
@@ -80,29 +70,8 @@ class CameraApp:
 
         self.video_stream = video_stream
         self.object_estimator = object_estimator
-        self.window_size_secs = window_size_secs        
-
-    def _draw_bbox(self, frame, bboxes):
-        """ Draw bounding boxes on current frame
-
-            Args:
-
-                ``frame`` (numpy array): image
-                ``bboxes`` (list(tuple)): bboxes coordinates in the form (xmin,xmax,ymin,ymax)
-
-            Returns:
-                Image (numpy array) with bouding boxes drawn
-        """
-
-        rect_frame = frame
-        for bbox in bboxes:
-
-            pt1 = (bbox[0], bbox[1])
-            pt2 = (bbox[2], bbox[3])
-            rect_frame = cv2.rectangle(
-                rect_frame, pt1, pt2, (34, 34, 178), thickness=2)  # TODO: auto-color
-
-        return rect_frame
+        self.window_size_secs = window_size_secs
+        self.renderer = FrameRenderer(partial(band_mask, bands=POOL_BANDS))
 
     def run(self, display=False, audit_writer=None):
         """ Run App
@@ -125,15 +94,11 @@ class CameraApp:
             frame = cv2.resize(frame,(FRAME_SIZE[1],FRAME_SIZE[0]))
             
             objs = self.object_estimator.process(frame)
-                        
-            frame = self._draw_bbox(
-                frame, [obj.bbox for obj in self.object_estimator.objects])
 
             if display:
-                
-                frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-                
-                frame = (0.6*frame + 0.4*POOL_MASK).astype(np.uint8)                
+
+                frame = self.renderer.render(
+                    frame, [obj.bbox for obj in self.object_estimator.objects])
 
                 cv2.imshow('Human-Tracking-CameraApp', frame)
                 if cv2.waitKey(1) & 0xFF == ord('q'):
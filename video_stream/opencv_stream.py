@@ -8,36 +8,74 @@
 
 """
 
-import base_stream
 import cv2
 import logging
+import os
+import threading
+import time
+
+from base_stream import BaseVideoStream
+from collections import deque
+
 logging.basicConfig()
 logger = logging.getLogger('OpenCV-VideoStream')
 logger.setLevel(logging.INFO)
 
 
-class OpenCVStream(base_stream.BaseVideoStream):
-    """ Video streaming using OpenCV 
+class OpenCVStream(BaseVideoStream):
+
+    """ Video streaming using OpenCV
         It works both with webcams and video files
+
+        When ``threaded`` is set, frames are decoded by a background reader into a bounded
+        buffer. For live cameras :meth:`next_frame` returns the newest one, dropping the stale ones,
+        which trades completeness for latency: the consumer always sees the most recent frame.
+        Video files are replayed in full: the reader waits for room in the buffer and frames are
+        returned in order, so none is dropped.
+
+        :attr:`timestamp` holds the capture time in seconds of the last returned frame: its position
+        for video files, so replaying a file gives the same timings at any speed, or the wall-clock
+        time at which it was read for live cameras.
     """
 
-    def __init__(self, camera_id):
+    def __init__(self, camera_id, threaded=False, buffer_size=1):
         """ Constructor
 
             Args:
                 ``camera_id`` (int or str): Camera id (int) or video file path (str)
+                ``threaded`` (bool): Whether or not to decode frames on a background thread
+                ``buffer_size`` (int): Max number of decoded frames kept by the background reader
         """
         self.camera_id = camera_id
         self.camera = None
+        self.threaded = threaded
+        self.buffer_size = buffer_size
+        self.frames_decoded = 0
+        self.frames_dropped = 0
+        self.timestamp = None
+        self.live = not (isinstance(camera_id, str) and os.path.isfile(camera_id))
+        self._buffer = deque(maxlen=buffer_size)
+        self._buffer_cond = threading.Condition()
+        self._reader = None
+        self._running = False
+
+        assert self.buffer_size > 0, 'Buffer size must be positive'
 
     def initialize(self):
-        """ Open OpenCV camera
+        """ Open OpenCV camera and start the background reader, if any
         """
         self.camera = cv2.VideoCapture(self.camera_id)
+        if self.threaded:
+            self._running = True
+            self._reader = threading.Thread(target=self._read_loop, name='OpenCVStream-Reader')
+            self._reader.daemon = True
+            self._reader.start()
 
     def next_frame(self):
-        """ Returns next frame as BGR numpy array
+        """ Returns next frame as RGB numpy array
         """
+        if self.threaded:
+            return self._next_buffered_frame()
 
         ret, frame = self.camera.read()
         if not ret:
@@ -45,10 +83,70 @@ class OpenCVStream(base_stream.BaseVideoStream):
             self.close()
             return None
         else:
+            self.frames_decoded += 1
+            self.timestamp = self._capture_timestamp()
             frame = cv2.cvtColor(frame,cv2.COLOR_BGR2RGB)
             return frame
 
+    def _capture_timestamp(self):
+        """ Timestamp in seconds of the frame just read
+        """
+        if not self.live:
+            return self.camera.get(cv2.CAP_PROP_POS_MSEC) / 1000.
+        return time.time()
+
+    def _next_buffered_frame(self):
+        """ Wait for the background reader and return the newest decoded frame, or the oldest one
+            for video files
+        """
+        with self._buffer_cond:
+            while not self._buffer and self._running:
+                self._buffer_cond.wait()
+            if not self._buffer:
+                logger.info('Streaming finished')
+                return None
+            if not self.live:
+                self.timestamp, frame = self._buffer.popleft()
+                self._buffer_cond.notify_all()
+                return frame
+            self.timestamp, frame = self._buffer.pop()
+            self.frames_dropped += len(self._buffer)
+            self._buffer.clear()
+        return frame
+
+    def _read_loop(self):
+        """ Background reader: decode frames as fast as the device delivers them, or as fast as
+            they are consumed for video files
+        """
+        while self._running:
+            ret, frame = self.camera.read()
+            if not ret:
+                break
+            timestamp = self._capture_timestamp()
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            with self._buffer_cond:
+                while not self.live and len(self._buffer) == self._buffer.maxlen and self._running:
+                    self._buffer_cond.wait()
+                if len(self._buffer) == self._buffer.maxlen:
+                    self.frames_dropped += 1
+                self._buffer.append((timestamp, frame))
+                self.frames_decoded += 1
+                self._buffer_cond.notify()
+
+        with self._buffer_cond:
+            self._running = False
+            self._buffer_cond.notify_all()
+        self.camera.release()
+
     def close(self):
         """ Close camera handler
         """
-        self.camera.release()
+        if self._reader is not None:
+            with self._buffer_cond:
+                self._running = False
+                self._buffer_cond.notify_all()
+            if self._reader is not threading.current_thread():
+                self._reader.join()
+            self._reader = None
+        else:
+            self.camera.release()
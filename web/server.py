@@ -1,50 +1,105 @@
-from flask import Flask, request
+from flask import Flask, Response, request
 from flask_cors import CORS, cross_origin
 from flask_restful import Resource, Api
-from json import dumps
-from flask_jsonpify import jsonify
+from json import dumps, load
+import logging
+import os
 import threading
-from random import randint
+import time
 
 app = Flask(__name__)
 api = Api(app)
 
 CORS(app)
 
-globvar = 0
+logging.basicConfig()
+logger = logging.getLogger('Mock-Server')
+logger.setLevel(logging.INFO)
+
+# Tracker status file, see tracker/config.py
+STATUS_FILE = os.getenv('STATUS_FILE', '../status.json')
+REFRESH_SECS = 0.2
+
+
+class StatusPoller(threading.Thread):
+    """ Single long-lived worker that refreshes the risk values every ``period`` seconds, on a monotonic
+        schedule, and caches the serialized response.
+
+        Values come from the tracker status file, which is only parsed when it changes. Until it has
+        been read once, there is no body and the server answers 503. Read errors after that keep the
+        last values.
+    """
+
+    def __init__(self, path, period):
+        super(StatusPoller, self).__init__(name='StatusPoller')
+        self.daemon = True
+        self.path = path
+        self.period = period
+        self.body = None
+        self._mtime = None
+        self._failing = False
+        self._stop_event = threading.Event()
+        self.refresh()
+
+    def run(self):
+        next_tick = time.monotonic()
+        while not self._stop_event.is_set():
+            self.refresh()
+            next_tick += self.period
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                # running late, skip the missed ticks instead of bursting
+                next_tick = time.monotonic()
+                delay = 0
+            self._stop_event.wait(delay)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def refresh(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self._mtime:
+                return
+            with open(self.path) as status_file:
+                status = load(status_file)
+            self._mtime = mtime
+            data = { 'riskPosition': status.get('riskPosition', 0), 'faceWaterSeconds': status.get('faceWaterSeconds', 0),
+                     'riskPanic': status.get('riskPanic', 0) }
+        except (IOError, OSError, ValueError) as e:
+            self._mtime = None
+            if not self._failing:
+                logger.warning('Could not read {}, serving {}: {}'.format(
+                    self.path, 'the last status' if self.body is not None else 'no data', e))
+            self._failing = True
+            return
+        self._failing = False
+        self.body = dumps(data)
+
+
+poller = StatusPoller(STATUS_FILE, REFRESH_SECS)
 
 @app.route("/")
 def get():
-    positionRandom = randint(0, 100)
-    submergedRandom = randint(0, 300)
-    panicRandom = randint(0, 100)
-    return jsonify({ 'riskPosition': positionRandom, 'faceWaterSeconds': submergedRandom, 'riskPanic': panicRandom })
+    if poller.body is None:
+        return Response(dumps({ 'error': 'No tracker status yet' }), status=503, mimetype='application/json')
+    return Response(poller.body, mimetype='application/json')
 
 # class Employees(Resource):
 #     def get(self):
-#         return {'employees': [{'id':globvar, 'name':'Balram'},{'id':2, 'name':'Tom'}]} 
+#         return {'employees': [{'id':globvar, 'name':'Balram'},{'id':2, 'name':'Tom'}]}
 
 # class Employees_Name(Resource):
 #     def get(self, employee_id):
 #         print('Employee id:' + employee_id)
 #         result = {'data': {'id':1, 'name':'Balram'}}
-#         return jsonify(result)       
+#         return jsonify(result)
 
 
 # api.add_resource(Employees, '/employees') # Route_1
 # api.add_resource(Employees_Name, '/employees/<employee_id>') # Route_3
 
-def mlFunction():
-  threading.Timer(0.2, mlFunction).start()
-  global globvar
-  globvar += 1
-  
-
-mlFunction()
+poller.start()
 
 if __name__ == '__main__':
      app.run(port=5002)
-
-
-
-
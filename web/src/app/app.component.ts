@@ -1,7 +1,7 @@
 import { Component } from '@angular/core';
 import { HttpClient } from '@angular/common/http';
-import { interval } from 'rxjs';
-import { switchMap } from 'rxjs/operators';
+import { EMPTY, interval, Subscription } from 'rxjs';
+import { catchError, filter, switchMap } from 'rxjs/operators';
 
 interface IRiskData {
     riskPosition: number;
@@ -16,6 +16,12 @@ interface IRiskData {
 })
 export class AppComponent {
     baseUrl = 'http://localhost:5000/status';
+    streamUrl = 'http://localhost:5000/status/stream';
+    eventSource: EventSource;
+    // Poll while the stream has been silent for that long: the tracker publishes at least every 200 ms
+    streamIdleMs = 3000;
+    lastEventTime = 0;
+    idlePolling: Subscription;
     chartDatas: any[] = [
         {
             gaugeType: 'semi',
@@ -59,27 +65,73 @@ export class AppComponent {
     }
 
     public ngOnInit() {
-        this.requestForever();
+        if (typeof EventSource !== 'undefined') {
+            this.listenForever();
+        } else {
+            this.requestForever();
+        }
+    }
+
+    public ngOnDestroy() {
+        if (this.eventSource) {
+            this.eventSource.close();
+        }
+        if (this.idlePolling) {
+            this.idlePolling.unsubscribe();
+        }
+    }
+
+    // Status pushed by the API as soon as the tracker publishes it. The browser reconnects on errors
+    private listenForever() {
+        this.eventSource = new EventSource(this.streamUrl);
+        this.eventSource.onmessage = (event: MessageEvent) => {
+            this.lastEventTime = Date.now();
+            this.updateRisk(JSON.parse(event.data));
+        };
+        this.eventSource.onerror = (error: Event) => {
+            console.error(error);
+        };
+        this.pollWhileIdle();
+    }
+
+    // The stream may be connected but fed by nothing (e.g. the API cannot reach the tracker): poll meanwhile
+    private pollWhileIdle() {
+        this.idlePolling = interval(1000).pipe(
+            filter(() => Date.now() - this.lastEventTime > this.streamIdleMs),
+            switchMap(() => this.httpClient.get(this.baseUrl).pipe(
+                catchError((error: Error) => {
+                    console.error(error);
+                    return EMPTY;
+                })
+            ))
+        ).subscribe((data: IRiskData) => {
+            this.updateRisk(data);
+        });
     }
 
     private requestForever() {
+        // errors, e.g. 503 until the server has a status, are caught per request so that polling goes on
         const result = interval(1000).pipe(
-            switchMap(() => this.httpClient.get(this.baseUrl))
+            switchMap(() => this.httpClient.get(this.baseUrl).pipe(
+                catchError((error: Error) => {
+                    console.error(error);
+                    return EMPTY;
+                })
+            ))
         );
 
-        result.subscribe(
-            (data: IRiskData) => {
-                this.chartDatas[0].gaugeValue = data.riskPosition;
-                this.chartDatas[1].gaugeValue = this.calcFaceWaterPercent(data.faceWaterSeconds);
-                this.chartDatas[2].gaugeValue = data.riskPanic;
-
-                this.totalRiskVal = this.calcRisk(data);
-                this.totalRiskTxt = this.getRiskTxt(this.totalRiskVal);
-            },
-            (error: Error) => {
-                console.error(error);
-            }
-        );
+        result.subscribe((data: IRiskData) => {
+            this.updateRisk(data);
+        });
+    }
+
+    private updateRisk(data: IRiskData) {
+        this.chartDatas[0].gaugeValue = data.riskPosition;
+        this.chartDatas[1].gaugeValue = this.calcFaceWaterPercent(data.faceWaterSeconds);
+        this.chartDatas[2].gaugeValue = data.riskPanic;
+
+        this.totalRiskVal = this.calcRisk(data);
+        this.totalRiskTxt = this.getRiskTxt(this.totalRiskVal);
     }
 
     private calcFaceWaterPercent(faceWaterSeconds: number): number {